@@ -1,39 +1,44 @@
 import random
 
 class AIPlayer:
-    def __init__(self, color):
-        # Initialize the AI player with a color (black or white)
+    def __init__(self, color, book=None):
+        # Initialize the AI player with a color (black or white) and an optional OpeningBook
         self.color = color
+        self.book = book
+        self.nodes = 0  # Work done by the current search, readable while it runs
+        self.stop_requested = False  # Set from another thread to end a search early
 
     def make_move(self, game_state):
-        possible_moves = []
-        possible_captures = []
-
-        # Iterate through all tiles on the board
-        for row in range(8):
-            for col in range(8):
-                tile = game_state.board.tiles[row][col]
-                # Check if the tile has a piece of the AI's color
-                if tile.piece and tile.piece.color == self.color:
-                    # Get all possible moves and captures for the piece
-                    moves = tile.piece.get_possible_moves(game_state.board.tiles)
-                    captures = tile.piece.get_possible_captures(game_state.board.tiles)
-                    # Add moves and captures to their respective lists
-                    for move in moves:
-                        possible_moves.append((tile.piece, move[0], move[1]))
-                    for capture in captures:
-                        possible_captures.append((tile.piece, capture[0], capture[1]))
-
-        # Choose a move, prioritizing captures over normal moves
-        if possible_captures:
-            # Randomly select a capture move if available
-            piece, new_row, new_col = random.choice(possible_captures)
-        elif possible_moves:
-            # Randomly select a normal move if no captures are available
-            piece, new_row, new_col = random.choice(possible_moves)
-        else:
+        # Choose a move from the board's bitboard and play it
+        move = self.choose_move(game_state.board.bitboard, self.color)
+        if move is None:
             # No valid moves available, end the turn
             return
 
         # Execute the chosen move
-        game_state.try_move(piece, new_row, new_col)
+        self.play_move(game_state, move)
+
+    def book_move(self, bitboard, color):
+        # A move from the opening book for this position, or None once out of book
+        return self.book.choose_move(bitboard, color) if self.book is not None else None
+
+    def choose_move(self, bitboard, color):
+        book_move = self.book_move(bitboard, color)
+        if book_move is not None:
+            return book_move
+
+        # Legal moves straight from the bitboard (captures only, whenever there is one)
+        legal_moves = bitboard.get_legal(color)
+
+        # Randomly select one of them
+        if legal_moves:
+            return random.choice(legal_moves)
+        return None
+
+    def request_stop(self):
+        # Ask a running choose_move (or ponder) to return as soon as possible
+        self.stop_requested = True
+
+    def play_move(self, game_state, move):
+        # Hand a bitboard move (origin, target, captured) to the rules engine, which checks it is legal
+        game_state.play_move(move)
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+def _choose_in_process(player, bitboard, color):
+    # Runs in a worker process on a pickled copy of the player; the report travels back with the move
+    move = player.choose_move(bitboard, color)
+    return move, getattr(player, "last_report", None)
+
+
+class AIWorker:
+    def __init__(self, player, use_processes=False, ponder=False):
+        # Runs an AI player's choose_move off the render thread.
+        # Threads (the default) let the UI read live node counts and allow pondering;
+        # processes avoid the GIL but only report once the move is done.
+        self.player = player
+        self.use_processes = use_processes
+        self.ponder_enabled = ponder and not use_processes and hasattr(player, "ponder")
+        self.executor = ProcessPoolExecutor(max_workers=1) if use_processes else ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.pondering = False
+        self.position_key = None  # Position the running search was started from
+        self.start_time = None
+
+    def thinking(self):
+        # True while a move search (not a ponder) is running
+        return self.future is not None and not self.pondering
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+
+    def nodes(self):
+        # Live node (or rollout) count; only available for thread workers
+        return None if self.use_processes else self.player.nodes
+
+    def start_search(self, game_state):
+        # Start searching the current position for the side to move
+        self.cancel()
+        bitboard, color = game_state.board.bitboard.copy(), game_state.current_turn
+        self.player.stop_requested = False
+        if self.use_processes:
+            self.future = self.executor.submit(_choose_in_process, self.player, bitboard, color)
+        else:
+            self.future = self.executor.submit(self.run_search, bitboard, color)
+        self.pondering = False
+        self.position_key = game_state.zobrist_key
+        self.start_time = time.perf_counter()
+
+    def start_ponder(self, game_state):
+        # Think about the opponent's position while waiting for their move
+        if not self.ponder_enabled or self.future is not None:
+            return
+        self.player.stop_requested = False
+        self.future = self.executor.submit(self.run_ponder, game_state.board.bitboard.copy(), game_state.current_turn)
+        self.pondering = True
+        self.position_key = game_state.zobrist_key
+        self.start_time = time.perf_counter()
+
+    def run_search(self, bitboard, color):
+        # The search job on the worker thread (its own method so Profiler can time it)
+        return self.player.choose_move(bitboard, color)
+
+    def run_ponder(self, bitboard, color):
+        # The ponder job on the worker thread
+        return self.player.ponder(bitboard, color)
+
+    def poll(self, game_state):
+        # Return the finished move for the current position, or None while still thinking.
+        # Results for a position that has since changed (e.g. after undo) are dropped.
+        if self.future is None or self.pondering or not self.future.done():
+            return None
+        result = self.future.result()
+        self.future = None
+        if self.use_processes:
+            result, self.player.last_report = result
+        if self.position_key != game_state.zobrist_key:
+            return None
+        return result
+
+    def cancel(self):
+        # Stop whatever is running and wait for it to wind down (the search checks the flag often).
+        # A process worker holds its own copy of the player, so there it runs out its time budget.
+        if self.future is None:
+            return
+        if not self.future.cancel():
+            self.player.request_stop()
+            self.future.result()
+        self.future = None
+        self.pondering = False
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,276 @@
+import time
+from AI_Player import AIPlayer
+from Bitboard import generate_captures, generate_moves, generate_legal, apply_move, has_moves, popcount
+from Zobrist import side_key, update_key
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from Evaluation import load_evaluator
+from Tablebase import WIN, LOSS
+from Constants import BLACK, WHITE
+
+# Scores are from the point of view of the side to move
+WIN_SCORE = 100000
+MAX_DEPTH = 64
+# Scores beyond this are proven wins or losses (from the search or the tablebase) and carry a distance
+MATE_BOUND = WIN_SCORE - 1000
+
+
+class SearchTimeout(Exception):
+    # Raised inside the search once the time or node budget is used up
+    pass
+
+
+class AlphaBetaPlayer(AIPlayer):
+    def __init__(self, color, time_limit=0.016, node_limit=None, max_depth=MAX_DEPTH, tt_memory_mb=16, tablebase=None,
+                 book=None, weights=None, verbose=False):
+        # Negamax alpha-beta player with iterative deepening.
+        # time_limit is in seconds per move; node_limit optionally caps the nodes searched;
+        # tt_memory_mb caps the transposition table, which is kept between moves;
+        # tablebase is an optional Tablebase giving exact results for small endgames;
+        # book is an optional OpeningBook consulted before searching;
+        # weights overrides Evaluation.DEFAULT_WEIGHTS, or names a weights file (JSON, or a network
+        # trained by Learning.py) that is loaded now.
+        super().__init__(color, book)
+        self.evaluator = load_evaluator(weights)
+        self.tt = TranspositionTable(tt_memory_mb)
+        self.tablebase = tablebase
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.verbose = verbose
+        self.deadline = None
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+        self.history = {BLACK: [0] * 1024, WHITE: [0] * 1024}
+        self.last_report = None  # Depth, nodes, nodes per second and score of the last search
+        self.batched_leaves = 0  # Leaves scored by evaluate_batch in the current search, cut off or not
+
+    def make_move(self, game_state):
+        # Search the current position and play the best move found
+        move = self.choose_move(game_state.board.bitboard, game_state.current_turn)
+        if move is not None:
+            self.play_move(game_state, move)
+
+    def choose_move(self, bitboard, color):
+        # Iterative deepening: keep the best move of the deepest fully searched iteration
+        book_move = self.book_move(bitboard, color)
+        if book_move is not None:
+            self.last_report = {"depth": 0, "nodes": 0, "time": 0.0, "nps": 0, "score": 0, "tt_hit_rate": 0.0,
+                                "book": True}
+            if self.verbose:
+                print("AI: book move")
+            return book_move
+
+        own, opp = bitboard.sides(color)
+        kings = bitboard.kings
+        key = bitboard.hash ^ side_key(color)
+        root_moves = generate_legal(own, opp, kings, color)
+        if not root_moves:
+            return None
+
+        self.nodes = 0
+        self.batched_leaves = 0
+        self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+        # Age the history scores so older searches count for less
+        self.history = {side: [score // 2 for score in scores] for side, scores in self.history.items()}
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        start = time.perf_counter()
+        best_move, best_score, depth_reached = root_moves[0], 0, 0
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self.search_root(own, opp, kings, color, key, depth, root_moves)
+            except SearchTimeout:
+                break
+            best_move, best_score, depth_reached = move, score, depth
+            # Search the previous best move first in the next iteration
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= MATE_BOUND:
+                break  # Forced result found, deeper search will not change it
+
+        elapsed = time.perf_counter() - start
+        self.last_report = {
+            "depth": depth_reached,
+            "nodes": self.nodes,
+            "time": elapsed,
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+            "score": best_score,
+            "tt_hit_rate": self.tt.hit_rate(),
+            "batched_leaves": self.batched_leaves,
+        }
+        if self.verbose:
+            print(f"AI: depth {depth_reached}, {self.nodes} nodes, {self.last_report['nps']} nodes/s, score {best_score}")
+        return best_move
+
+    def search_root(self, own, opp, kings, color, key, depth, root_moves):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = root_moves[0]
+        other = WHITE if color == BLACK else BLACK
+        # The table score is computed once here and then updated move by move, like the key
+        black, white = (own, opp) if color == BLACK else (opp, own)
+        root_score = self.evaluator.score_position(black, white, kings)
+        if color == WHITE:
+            root_score = -root_score
+        move_delta = self.evaluator.move_delta
+        for move in root_moves:
+            new_own, new_opp, new_kings = apply_move(own, opp, kings, move, color)
+            new_key = update_key(key, move, color, kings, new_kings)
+            new_score = -(root_score + move_delta(move, color, kings, new_kings))
+            score = -self.negamax(new_opp, new_own, new_kings, other, new_key, new_score, depth - 1, -beta, -alpha, 1)
+            if score > alpha:
+                alpha, best_move = score, move
+        self.tt.store(key, depth, EXACT, alpha, best_move[:2])
+        return alpha, best_move
+
+    def negamax(self, own, opp, kings, color, key, table_score, depth, alpha, beta, ply):
+        # table_score is the running piece-square score from the side to move's point of view
+        self.nodes += 1
+        if self.nodes & 127 == 0:
+            self.check_budget()
+
+        # Small endgames are looked up exactly instead of searched
+        if self.tablebase is not None and popcount(own | opp) <= self.tablebase.max_pieces:
+            black, white = (own, opp) if color == BLACK else (opp, own)
+            result, distance = self.tablebase.probe(black, white, kings, color)
+            if result == WIN:
+                return WIN_SCORE - ply - distance
+            if result == LOSS:
+                return -(WIN_SCORE - ply - distance)
+            return 0
+
+        # Reuse a stored result when it was searched at least this deeply
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            entry_depth, flag, score, tt_move = entry
+            if entry_depth >= depth:
+                # Win scores are stored relative to the node, convert back to this ply
+                if score > MATE_BOUND:
+                    score -= ply
+                elif score < -MATE_BOUND:
+                    score += ply
+                if flag == EXACT or (flag == LOWER_BOUND and score >= beta) or (flag == UPPER_BOUND and score <= alpha):
+                    return score
+
+        other = WHITE if color == BLACK else BLACK
+        # Capturing is compulsory, so quiet moves are only generated when there is no capture
+        captures = generate_captures(own, opp, kings, color)
+        quiet = [] if captures else generate_moves(own, opp, kings, color)
+
+        # Game over follows GameState.is_game_over: the side to move loses when it has no legal move
+        if not captures and not quiet:
+            return -(WIN_SCORE - ply)
+
+        if depth <= 0:
+            return self.evaluator.evaluate(own, opp, kings, color, table_score)
+
+        # Move ordering: table move, captures, then killer moves, then quiet moves by history score
+        history = self.history[color]
+        killers = self.killers[ply]
+        quiet.sort(key=lambda move: history[move[0] * 32 + move[1]], reverse=True)
+        for killer in reversed(killers):
+            if killer in quiet:
+                quiet.remove(killer)
+                quiet.insert(0, killer)
+        moves = captures + quiet
+        if tt_move is not None:
+            for index, move in enumerate(moves):
+                if move[0] == tt_move[0] and move[1] == tt_move[1]:
+                    moves.insert(0, moves.pop(index))
+                    break
+
+        # A batched evaluator scores all the leaves below a frontier node at once
+        leaf_scores = batched = None
+        if depth == 1 and self.evaluator.batched:
+            leaf_scores, batched = self.frontier_scores(own, opp, kings, color, key, table_score, moves, ply)
+
+        original_alpha = alpha
+        best_score, best_move = -WIN_SCORE - 1, None
+        move_delta = self.evaluator.move_delta
+        for index, move in enumerate(moves):
+            if leaf_scores is not None:
+                score = leaf_scores[index]
+                if index in batched:
+                    # A batched leaf counts as a node once the loop reaches it, as it would unbatched
+                    self.nodes += 1
+                    if self.nodes & 127 == 0:
+                        self.check_budget()
+            else:
+                new_own, new_opp, new_kings = apply_move(own, opp, kings, move, color)
+                new_key = update_key(key, move, color, kings, new_kings)
+                new_score = -(table_score + move_delta(move, color, kings, new_kings))
+                score = -self.negamax(new_opp, new_own, new_kings, other, new_key, new_score, depth - 1, -beta,
+                                      -alpha, ply + 1)
+            if score > best_score:
+                best_score, best_move = score, move
+            if score >= beta:
+                if not move[2]:
+                    # Remember quiet moves that cause a cutoff
+                    if killers[0] != move:
+                        killers[1], killers[0] = killers[0], move
+                    history[move[0] * 32 + move[1]] += depth * depth
+                break
+            if score > alpha:
+                alpha = score
+
+        if best_score >= beta:
+            flag = LOWER_BOUND
+        elif best_score > original_alpha:
+            flag = EXACT
+        else:
+            flag = UPPER_BOUND
+        stored = best_score
+        if stored > MATE_BOUND:
+            stored += ply
+        elif stored < -MATE_BOUND:
+            stored -= ply
+        self.tt.store(key, depth, flag, stored, best_move[:2])
+        return best_score
+
+    def frontier_scores(self, own, opp, kings, color, key, table_score, moves, ply):
+        # Scores of moves from a depth-1 node, from its point of view. Leaves the evaluator cannot
+        # judge (no legal move, tablebase endgames) go through negamax; the rest are evaluated
+        # together in one evaluate_batch call. Every move is scored, so there are no cutoffs
+        # among the leaves, but one matrix multiply costs less than a call per leaf. Returns the
+        # scores and the indices of the batched moves; negamax counts those as nodes only when
+        # its loop reaches them, so node counts stay comparable with an unbatched search.
+        other = WHITE if color == BLACK else BLACK
+        scores = [None] * len(moves)
+        batch, batch_own, batch_opp, batch_kings = [], [], [], []
+        for index, move in enumerate(moves):
+            new_own, new_opp, new_kings = apply_move(own, opp, kings, move, color)
+            if ((self.tablebase is not None and popcount(new_own | new_opp) <= self.tablebase.max_pieces)
+                    or not has_moves(new_opp, new_own, new_kings, other)):
+                new_key = update_key(key, move, color, kings, new_kings)
+                new_score = -(table_score + self.evaluator.move_delta(move, color, kings, new_kings))
+                scores[index] = -self.negamax(new_opp, new_own, new_kings, other, new_key, new_score, 0,
+                                              -WIN_SCORE - 1, WIN_SCORE + 1, ply + 1)
+            else:
+                batch.append(index)
+                batch_own.append(new_opp)
+                batch_opp.append(new_own)
+                batch_kings.append(new_kings)
+        if batch:
+            self.batched_leaves += len(batch)
+            for index, score in zip(batch, self.evaluator.evaluate_batch(batch_own, batch_opp, batch_kings, other)):
+                scores[index] = -score
+        return scores, set(batch)
+
+    def ponder(self, bitboard, color):
+        # Search the opponent's position with no time limit until stopped; the
+        # result is thrown away, but the transposition table keeps what was learned
+        time_limit, verbose, last_report = self.time_limit, self.verbose, self.last_report
+        self.time_limit, self.verbose = None, False
+        try:
+            self.choose_move(bitboard, color)
+        finally:
+            self.time_limit, self.verbose, self.last_report = time_limit, verbose, last_report
+
+    def check_budget(self):
+        # Abort the current iteration once the time or node budget is spent, or when asked to stop
+        if self.stop_requested:
+            raise SearchTimeout()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
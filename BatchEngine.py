@@ -0,0 +1,296 @@
+import argparse
+import time
+import numpy as np
+from Bitboard import SQUARES, STEPS, DIRECTIONS, FORWARD, PROMOTION_MASK, coords_to_square, square_to_coords, jump_path
+from Constants import BLACK, WHITE
+
+# Vectorised rules engine: a batch of N positions as uint32 bitboards (black,
+# white, kings) plus the side to move (0 BLACK, 1 WHITE). Every possible move
+# on the board is a "slot" (origin, target, jumped square); legality for the
+# whole batch is one N x SLOTS boolean array built from the slot bit masks.
+# The rules are the same as Pawn/King (and the bitboard engine): men step or
+# jump forward, kings slide any distance and jump in every direction, capturing
+# is compulsory and a man reaching the far row is promoted. A capture sequence is
+# played one jump per apply(): the turn only passes once the piece cannot jump
+# again, and the pieces it took come off the board at that point.
+
+TURN_BLACK, TURN_WHITE = 0, 1
+RUNNING = -1  # winner() value while the game goes on (else the winning side's turn index)
+
+
+def _build_slots():
+    # One slot per (origin, direction, distance) slide and per (origin, direction) jump
+    origins, targets, jumped, paths, directions, slides = [], [], [], [], [], []
+    for square in range(SQUARES):
+        row, col = square_to_coords(square)
+        for direction, (row_offset, col_offset) in enumerate(DIRECTIONS):
+            path = 0
+            for distance in range(1, 8):
+                target = coords_to_square(row + distance * row_offset, col + distance * col_offset)
+                if target is None:
+                    break
+                origins.append(square)
+                targets.append(target)
+                jumped.append(0)
+                paths.append(path)
+                directions.append(direction)
+                slides.append(distance > 1)
+                path |= 1 << target
+            middle = coords_to_square(row + row_offset, col + col_offset)
+            landing = coords_to_square(row + 2 * row_offset, col + 2 * col_offset)
+            if middle is not None and landing is not None:
+                origins.append(square)
+                targets.append(landing)
+                jumped.append(1 << middle)
+                paths.append(0)
+                directions.append(direction)
+                slides.append(False)
+    return (np.array(origins, dtype=np.int8), np.array(targets, dtype=np.int8),
+            np.array(jumped, dtype=np.uint32), np.array(paths, dtype=np.uint32),
+            np.array(directions, dtype=np.int8), np.array(slides, dtype=bool))
+
+
+SLOT_ORIGIN, SLOT_TARGET, SLOT_JUMPED, SLOT_PATH, SLOT_DIRECTION, SLOT_SLIDE = _build_slots()
+SLOTS = len(SLOT_ORIGIN)
+SLOT_ORIGIN_BIT = (np.uint32(1) << SLOT_ORIGIN.astype(np.uint32)).astype(np.uint32)
+SLOT_TARGET_BIT = (np.uint32(1) << SLOT_TARGET.astype(np.uint32)).astype(np.uint32)
+SLOT_CAPTURE = SLOT_JUMPED != 0
+# Slots a man may use: single forward steps and forward jumps, per side to move
+MAN_SLOT = np.array([[direction in FORWARD[color] and not slide for direction, slide in zip(SLOT_DIRECTION, SLOT_SLIDE)]
+                     for color in (BLACK, WHITE)])
+PROMOTION = np.array([PROMOTION_MASK[BLACK], PROMOTION_MASK[WHITE]], dtype=np.uint32)
+START = (np.uint32(0xFFF00000), np.uint32(0x00000FFF))  # BLACK on rows 5-7, WHITE on rows 0-2
+
+
+def _step(bitboards, direction):
+    # Bitboard.step on a uint32 array
+    result = np.zeros_like(bitboards)
+    for mask, shift in STEPS[direction]:
+        part = bitboards & np.uint32(mask)
+        result |= part << np.uint32(shift) if shift > 0 else part >> np.uint32(-shift)
+    return result
+
+
+class BatchBoards:
+    def __init__(self, size, black=None, white=None, kings=None, turn=None, chain=None, pending=None):
+        # size positions, all at the start position unless arrays are given. chain is the square of
+        # a piece in the middle of a capture sequence (-1 for none) and pending the pieces it has
+        # jumped so far, which stay on the board until the sequence ends.
+        self.black = np.full(size, START[0], dtype=np.uint32) if black is None else np.asarray(black, dtype=np.uint32)
+        self.white = np.full(size, START[1], dtype=np.uint32) if white is None else np.asarray(white, dtype=np.uint32)
+        self.kings = np.zeros(size, dtype=np.uint32) if kings is None else np.asarray(kings, dtype=np.uint32)
+        self.turn = np.zeros(size, dtype=np.int8) if turn is None else np.asarray(turn, dtype=np.int8)
+        size = len(self.black)
+        self.chain = np.full(size, -1, dtype=np.int8) if chain is None else np.asarray(chain, dtype=np.int8)
+        self.pending = np.zeros(size, dtype=np.uint32) if pending is None else np.asarray(pending, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.black)
+
+    def sides(self, turn):
+        # (own, opp) masks when `turn` (a 0/1 array) is to move
+        white_to_move = turn == TURN_WHITE
+        return np.where(white_to_move, self.white, self.black), np.where(white_to_move, self.black, self.white)
+
+    def select(self, mask):
+        # A new batch holding the positions where mask is true
+        return BatchBoards(0, self.black[mask], self.white[mask], self.kings[mask], self.turn[mask],
+                           self.chain[mask], self.pending[mask])
+
+    def has_moves(self, turn):
+        # Per position, whether `turn` has any move, from whole-board shifts (cheaper than legal_moves)
+        own, opp = self.sides(turn)
+        empty = ~(self.black | self.white)
+        own_kings = own & self.kings
+        black_to_move = turn == TURN_BLACK
+        found = np.zeros(len(self), dtype=bool)
+        for direction in range(4):
+            movers = np.where(black_to_move,
+                              own if direction in FORWARD[BLACK] else own_kings,
+                              own if direction in FORWARD[WHITE] else own_kings)
+            reached = _step(movers, direction)
+            found |= ((reached & empty) | (_step(reached & opp, direction) & empty)) != 0
+        return found
+
+    def can_jump(self, pieces, turn):
+        # Per position, whether any of `pieces` (belonging to `turn`) can jump a piece not already taken
+        own, opp = self.sides(turn)
+        targets = opp & ~self.pending
+        empty = ~(self.black | self.white)
+        black_to_move = turn == TURN_BLACK
+        found = np.zeros(len(self), dtype=bool)
+        for direction in range(4):
+            movers = np.where(black_to_move,
+                              pieces if direction in FORWARD[BLACK] else pieces & self.kings,
+                              pieces if direction in FORWARD[WHITE] else pieces & self.kings)
+            found |= (_step(_step(movers, direction) & targets, direction) & empty) != 0
+        return found
+
+    def legal_moves(self):
+        # N x SLOTS mask of the legal moves (single steps, slides and jumps) for the side to move:
+        # only jumps when there is one, and only the chained piece's jumps mid-sequence
+        turn = self.turn
+        own, opp = self.sides(turn)
+        occupied = (self.black | self.white)[:, None]
+        own, jumpable, kings = own[:, None], (opp & ~self.pending)[:, None], self.kings[:, None]
+        legal = (own & SLOT_ORIGIN_BIT) != 0
+        legal &= (occupied & SLOT_TARGET_BIT) == 0
+        legal &= (occupied & SLOT_PATH) == 0
+        legal &= ~SLOT_CAPTURE | ((jumpable & SLOT_JUMPED) != 0)
+        legal &= ((kings & SLOT_ORIGIN_BIT) != 0) | MAN_SLOT[turn.astype(np.intp)]
+        captures = legal & SLOT_CAPTURE
+        chained = self.chain >= 0
+        if chained.any():
+            captures &= ~chained[:, None] | (SLOT_ORIGIN[None, :] == self.chain[:, None])
+        return np.where((captures.any(axis=1) | chained)[:, None], captures, legal)
+
+    def winner(self):
+        # Per position, as Bitboard.winner: RUNNING, or the winner's turn index once the side to move is stuck
+        stuck = ~self.has_moves(self.turn) & (self.chain < 0)
+        return np.where(stuck, 1 - self.turn, RUNNING).astype(np.int8)
+
+    def apply(self, slots, active=None):
+        # Play slot index slots[i] in position i (only where active is true). The turn passes unless
+        # the slot was a jump and the same piece can jump again; then it has to carry on next apply().
+        if active is None:
+            active = np.ones(len(self), dtype=bool)
+        origin = np.where(active, SLOT_ORIGIN_BIT[slots], 0).astype(np.uint32)
+        target = np.where(active, SLOT_TARGET_BIT[slots], 0).astype(np.uint32)
+        jumped = np.where(active, SLOT_JUMPED[slots], 0).astype(np.uint32)
+        white_to_move = self.turn == TURN_WHITE
+        moved = origin | target
+        self.black ^= np.where(white_to_move, 0, moved).astype(np.uint32)
+        self.white ^= np.where(white_to_move, moved, 0).astype(np.uint32)
+        was_king = (self.kings & origin) != 0
+        promoted = ~was_king & ((target & PROMOTION[self.turn.astype(np.intp)]) != 0)
+        self.kings ^= np.where(was_king, moved, 0).astype(np.uint32)
+        self.kings |= np.where(promoted, target, 0).astype(np.uint32)
+        self.pending |= jumped
+
+        # Promotion ends a capture sequence; otherwise it goes on while the piece has another jump
+        continuing = (jumped != 0) & ~promoted & self.can_jump(target, self.turn)
+        self.chain = np.where(active, np.where(continuing, SLOT_TARGET[slots], -1), self.chain).astype(np.int8)
+        ended = active & ~continuing
+        taken = np.where(ended, self.pending, 0).astype(np.uint32)
+        self.black &= ~taken
+        self.white &= ~taken
+        self.kings &= ~taken
+        self.pending &= ~taken
+        self.turn = np.where(ended, 1 - self.turn, self.turn).astype(np.int8)
+
+    def move_tuples(self, index, legal=None):
+        # Legal slots of one position as bitboard (from, to, captured) tuples, a single jump each
+        legal = self.legal_moves() if legal is None else legal
+        return [(int(SLOT_ORIGIN[slot]), int(SLOT_TARGET[slot]), int(SLOT_JUMPED[slot]))
+                for slot in np.flatnonzero(legal[index])]
+
+
+def random_moves(legal, rng):
+    # One random legal slot per row; rows without moves get slot 0
+    scores = np.where(legal, rng.random(legal.shape), -1.0)
+    return scores.argmax(axis=1)
+
+
+def self_play(games, batch_size=1024, max_plies=200, seed=0):
+    # Random self-play of `games` games in batches; returns the result counts and timing.
+    # A ply is a whole move, so the jumps of a capture sequence count once.
+    rng = np.random.default_rng(seed)
+    results = {"black": 0, "white": 0, "move_limit": 0}
+    plies_total = 0
+    start = time.perf_counter()
+    for offset in range(0, games, batch_size):
+        boards = BatchBoards(min(batch_size, games - offset))
+        plies = np.zeros(len(boards), dtype=np.int32)
+        while len(boards):
+            winner = boards.winner()
+            results["black"] += int(np.count_nonzero(winner == TURN_BLACK))
+            results["white"] += int(np.count_nonzero(winner == TURN_WHITE))
+            cut_off = (winner == RUNNING) & (plies >= max_plies)
+            results["move_limit"] += int(np.count_nonzero(cut_off))
+            plies_total += int(plies[(winner != RUNNING) | cut_off].sum())
+            # Finished games leave the batch so later plies only pay for live ones
+            running = (winner == RUNNING) & ~cut_off
+            boards, plies = boards.select(running), plies[running]
+            if not len(boards):
+                break
+            turn = boards.turn
+            boards.apply(random_moves(boards.legal_moves(), rng))
+            plies += boards.turn != turn
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "results": results,
+        "average_plies": plies_total / games if games else 0,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 1) if elapsed > 0 else 0,
+    }
+
+
+def check_against_rules(positions=2000, seed=0):
+    # Compare legal moves, game-over and move application with GameState along random games: the
+    # first jump of every legal capture sequence must be a legal slot, and playing a sequence jump
+    # by jump must give GameState's position with the turn passed.
+    # Returns the number of mismatching positions.
+    import random
+    from AI_Player import AIPlayer
+    from Rules import GameState
+    random.seed(seed)
+    players = {BLACK: AIPlayer(BLACK), WHITE: AIPlayer(WHITE)}
+    mismatches, checked = 0, 0
+    while checked < positions:
+        state = GameState()
+        while checked < positions:
+            bitboard = state.board.bitboard
+            turn = TURN_BLACK if state.current_turn == BLACK else TURN_WHITE
+            boards = BatchBoards(1, [bitboard.black], [bitboard.white], [bitboard.kings], [turn])
+            expected = {tuple(jump_path(move)[:2]) for move in state.legal_moves()}
+            got = {(origin, target) for origin, target, _ in boards.move_tuples(0)}
+            over = state.is_game_over()
+            batch_winner = int(boards.winner()[0])
+            expected_winner = {None: RUNNING, BLACK: TURN_BLACK, WHITE: TURN_WHITE}[over]
+            if got != expected or batch_winner != expected_winner:
+                mismatches += 1
+            checked += 1
+            if over is not None:
+                break
+            played = len(state.undo_stack)
+            players[state.current_turn].make_move(state)
+            if len(state.undo_stack) == played:
+                break
+            # Play the same move on the batch board, one jump at a time, and compare the resulting positions
+            path = jump_path(state.record_move(state.undo_stack[-1]))
+            for origin, target in zip(path, path[1:]):
+                slot = np.flatnonzero((SLOT_ORIGIN == origin) & (SLOT_TARGET == target) & boards.legal_moves()[0])
+                if not len(slot):
+                    break
+                boards.apply(slot[:1])
+            bitboard = state.board.bitboard
+            if (int(boards.black[0]), int(boards.white[0]), int(boards.kings[0]), int(boards.chain[0])) != \
+                    (bitboard.black, bitboard.white, bitboard.kings, -1) or int(boards.turn[0]) == turn:
+                mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Random self-play on the vectorised NumPy engine.")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="number of games")
+    parser.add_argument("-b", "--batch", type=int, default=1024, help="games advanced together")
+    parser.add_argument("--max-plies", type=int, default=200, help="plies before a game is cut off")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--check", action="store_true", help="first verify the engine against GameState")
+    args = parser.parse_args()
+
+    if args.check:
+        mismatches = check_against_rules()
+        print(f"rules check: {mismatches} mismatching positions")
+        if mismatches:
+            raise SystemExit(1)
+    report = self_play(args.games, args.batch, args.max_plies, args.seed)
+    results = report["results"]
+    print(f"{report['games']} games in {report['seconds']}s: {report['games_per_second']} games/s, "
+          f"average {report['average_plies']:.1f} plies")
+    print(f"BLACK {results['black']}, WHITE {results['white']}, move limit {results['move_limit']}")
+
+
+if __name__ == "__main__":
+    main()
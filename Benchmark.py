@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from AI_Player import AIPlayer
+from LazySMP_Player import LazySMPPlayer
+from PDN import fen, setup_fen
+from Perft import POSITIONS, perft, position_state
+from Rules import GameState
+from Constants import BLACK, WHITE
+
+# Speed benchmarks for the rules code. Each benchmark returns a dict of
+# measurements (rates are operations per second); results are saved as JSON
+# together with the commit they were taken at, so runs can be compared.
+
+
+def sample_positions(count=200, seed=1):
+    # PDN FENs of positions met in random games, for benchmarks that need varied positions
+    random.seed(seed)
+    players = {BLACK: AIPlayer(BLACK), WHITE: AIPlayer(WHITE)}
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        while state.is_game_over() is None and len(positions) < count:
+            positions.append(fen(state))
+            played = len(state.undo_stack)
+            players[state.current_turn].make_move(state)
+            if len(state.undo_stack) == played:
+                break
+    return positions
+
+
+def measure(operation, seconds):
+    # Call operation() until the time budget is spent; it returns how many operations it did
+    operations, start = 0, time.perf_counter()
+    while True:
+        operations += operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return {"operations": operations, "seconds": round(elapsed, 4), "rate": int(operations / elapsed)}
+
+
+def bench_perft(seconds, depth=4):
+    # Perft nodes per second over all test positions (Pawn/King generation, GameState make/unmake)
+    states = [position_state(position) for position in POSITIONS.values()]
+    return measure(lambda: sum(perft(state, depth) for state in states), seconds)
+
+
+def bench_movegen(seconds, positions):
+    # Board.get_all_moves (Pawn/King generation) calls per second
+    states = [position_state(position) for position in positions]
+
+    def generate():
+        for state in states:
+            state.board.get_all_moves(state.current_turn)
+        return len(states)
+    return measure(generate, seconds)
+
+
+def bench_bitboard_movegen(seconds, positions):
+    # Bitboard legal move generation calls per second
+    boards = [(state.board.bitboard, state.current_turn) for state in map(position_state, positions)]
+
+    def generate():
+        for bitboard, color in boards:
+            bitboard.get_legal(color)
+        return len(boards)
+    return measure(generate, seconds)
+
+
+def bench_game_over(seconds, positions):
+    # GameState.is_game_over calls per second (after the first call, a lookup in the cached move list)
+    states = [position_state(position) for position in positions]
+
+    def check():
+        for state in states:
+            state.is_game_over()
+        return len(states)
+    return measure(check, seconds)
+
+
+def bench_evaluate(seconds, positions):
+    # Leaf evaluations per second: from the board's running table score, and with the tables summed from scratch
+    states = [position_state(position) for position in positions]
+
+    def incremental():
+        for state in states:
+            state.evaluate()
+        return len(states)
+
+    def full():
+        for state in states:
+            bitboard = state.board.bitboard
+            own, opp = bitboard.sides(state.current_turn)
+            score = state.board.evaluator.score_position(bitboard.black, bitboard.white, bitboard.kings)
+            state.board.evaluator.evaluate(own, opp, bitboard.kings, state.current_turn,
+                                           score if state.current_turn == BLACK else -score)
+        return len(states)
+    return {"incremental": measure(incremental, seconds / 2), "full": measure(full, seconds / 2)}
+
+
+def bench_ai_move(seconds, positions):
+    # AIPlayer.make_move (choose and play a random move) per second; each move is taken back
+    states = [state for state in map(position_state, positions) if state.is_game_over() is None]
+    players = {BLACK: AIPlayer(BLACK), WHITE: AIPlayer(WHITE)}
+
+    def play():
+        for state in states:
+            players[state.current_turn].make_move(state)
+            state.unmake_move()
+        return len(states)
+    return measure(play, seconds)
+
+
+def bench_draw(seconds, positions):
+    # Board.draw frames per second under SDL's dummy video driver: full redraws and single-move redraws
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from Visualiser import Board
+    pygame.init()
+    screen = pygame.display.set_mode((800, 900))
+    state = GameState(board=Board(tile_size=100))
+    setup_fen(state, positions[len(positions) // 2])
+    board = state.board
+    board.draw(screen)
+    player = AIPlayer(state.current_turn)
+
+    def full():
+        board.mark_all_dirty()
+        board.draw(screen)
+        return 1
+
+    def incremental():
+        # A move and its take-back, each followed by a frame
+        player.color = state.current_turn
+        player.make_move(state)
+        board.draw(screen)
+        if state.undo_stack:
+            state.unmake_move()
+        board.draw(screen)
+        return 2
+
+    results = {"full": measure(full, seconds / 2), "incremental": measure(incremental, seconds / 2)}
+    pygame.quit()
+    return results
+
+
+def bench_parallel_search(seconds, positions, depth=7, searches=8):
+    # Lazy SMP time to a fixed depth with one worker against all cores; reports the speedup
+    workers = os.cpu_count() or 1
+    states = [state for state in map(position_state, positions[::max(1, len(positions) // searches)])
+              if state.is_game_over() is None][:searches]
+    results = {}
+    for count in sorted({1, workers}):
+        player = LazySMPPlayer(BLACK, workers=count, time_limit=None, max_depth=depth)
+        nodes, elapsed = 0, 0.0
+        for state in states:
+            player.tt.clear()  # Each search starts from an empty shared table; the clearing is not timed
+            start = time.perf_counter()
+            player.choose_move(state.board.bitboard, state.current_turn)
+            elapsed += time.perf_counter() - start
+            nodes += player.nodes + player.last_report.get("helper_nodes", 0)
+        player.close()
+        results[f"workers_{count}"] = {"operations": nodes, "seconds": round(elapsed, 4),
+                                       "rate": int(nodes / elapsed), "workers": count}
+    one, all_cores = results["workers_1"], results[f"workers_{workers}"]
+    results["speedup"] = round(one["seconds"] / all_cores["seconds"], 3)
+    return results
+
+
+BENCHMARKS = {
+    "perft": lambda seconds, positions: bench_perft(seconds),
+    "movegen": bench_movegen,
+    "bitboard_movegen": bench_bitboard_movegen,
+    "is_game_over": bench_game_over,
+    "evaluate": bench_evaluate,
+    "ai_make_move": bench_ai_move,
+    "draw": bench_draw,
+    "parallel_search": bench_parallel_search,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def rates(results, prefix=""):
+    # Flatten nested results to {name: rate}
+    flat = {}
+    for name, result in results.items():
+        if not isinstance(result, dict):
+            continue
+        if "rate" in result:
+            flat[prefix + name] = result["rate"]
+        else:
+            flat.update(rates(result, prefix + name + "."))
+    return flat
+
+
+def compare(results, baseline):
+    # Print each rate against the same benchmark in an earlier run
+    old = rates(baseline["results"])
+    for name, rate in rates(results).items():
+        if name in old and old[name]:
+            print(f"{name:28} {old[name]:>10} -> {rate:>10}  ({rate / old[name]:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark move generation, game-over checks, evaluation, AI moves "
+                                                 "and drawing.")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (%s; default all)" % ", ".join(BENCHMARKS))
+    parser.add_argument("-s", "--seconds", type=float, default=1.0, help="time budget per benchmark")
+    parser.add_argument("-o", "--output", default=None, help="save the results as JSON")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmark: " + ", ".join(unknown))
+    positions = sample_positions()
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](args.seconds, positions)
+        for label, rate in rates({name: results[name]}).items():
+            print(f"{label:28} {rate:>10} /s")
+        if "speedup" in results[name]:
+            print(f"{name + '.speedup':28} {results[name]['speedup']:>10.2f} x")
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+from Constants import BLACK, WHITE, END_ROW_BLACK, END_ROW_WHITE
+from Zobrist import PIECE_KEYS, SIDE_KEY, piece_kind, hash_position, update_key
+
+# Only the 32 dark squares ((row + col) odd) are playable. Each one gets a bit:
+# square = row * 4 + col // 2, so bit 0 is (0, 1) and bit 31 is (7, 6).
+SQUARES = 32
+FULL_MASK = (1 << SQUARES) - 1
+
+# Diagonal directions as (row offset, col offset). WHITE men move down the
+# board (+row), BLACK men move up (-row); kings use all four.
+DOWN_LEFT, DOWN_RIGHT, UP_LEFT, UP_RIGHT = 0, 1, 2, 3
+DIRECTIONS = ((1, -1), (1, 1), (-1, -1), (-1, 1))
+FORWARD = {WHITE: (DOWN_LEFT, DOWN_RIGHT), BLACK: (UP_LEFT, UP_RIGHT)}
+BACKWARD = {WHITE: (UP_LEFT, UP_RIGHT), BLACK: (DOWN_LEFT, DOWN_RIGHT)}
+
+
+def coords_to_square(row, col):
+    # Convert board coordinates to a square index (None for light squares)
+    if 0 <= row < 8 and 0 <= col < 8 and (row + col) % 2 == 1:
+        return row * 4 + col // 2
+    return None
+
+
+def square_to_coords(square):
+    # Convert a square index back to board coordinates
+    row = square // 4
+    return row, 2 * (square % 4) + (1 if row % 2 == 0 else 0)
+
+
+def _build_steps():
+    # For every direction, group the squares by how far their bit has to shift
+    # to reach the neighbouring square. Even and odd rows differ by one, so
+    # each direction ends up with exactly two (mask, shift) pairs.
+    steps = []
+    for row_offset, col_offset in DIRECTIONS:
+        groups = {}
+        for square in range(SQUARES):
+            row, col = square_to_coords(square)
+            target = coords_to_square(row + row_offset, col + col_offset)
+            if target is not None:
+                shift = target - square
+                groups[shift] = groups.get(shift, 0) | (1 << square)
+        steps.append(tuple((mask, shift) for shift, mask in sorted(groups.items())))
+    return tuple(steps)
+
+
+STEPS = _build_steps()
+
+
+def _neighbour(square, direction):
+    row, col = square_to_coords(square)
+    row_offset, col_offset = DIRECTIONS[direction]
+    return coords_to_square(row + row_offset, col + col_offset)
+
+
+def _row_mask(row):
+    return sum(1 << square for square in range(row * 4, row * 4 + 4))
+
+
+# Single-square neighbour table, used to decode a generated target back to its origin
+NEIGHBOURS = tuple(tuple(_neighbour(square, direction) for direction in range(4)) for square in range(SQUARES))
+OPPOSITE = (UP_RIGHT, UP_LEFT, DOWN_RIGHT, DOWN_LEFT)
+
+
+def _jump(square, direction):
+    # (jumped square, landing square) of a short jump, or None when it would leave the board
+    jumped = NEIGHBOURS[square][direction]
+    if jumped is None or NEIGHBOURS[jumped][direction] is None:
+        return None
+    return jumped, NEIGHBOURS[jumped][direction]
+
+
+JUMPS = tuple(tuple(_jump(square, direction) for direction in range(4)) for square in range(SQUARES))
+ALL_DIRECTIONS = (DOWN_LEFT, DOWN_RIGHT, UP_LEFT, UP_RIGHT)
+
+# Squares on which each colour's men are promoted
+PROMOTION_MASK = {BLACK: _row_mask(END_ROW_BLACK), WHITE: _row_mask(END_ROW_WHITE)}
+
+
+def step(bitboard, direction):
+    # Shift every set square one step in a direction, dropping squares that fall off the board
+    (mask_a, shift_a), (mask_b, shift_b) = STEPS[direction]
+    if shift_a > 0:
+        return ((bitboard & mask_a) << shift_a) | ((bitboard & mask_b) << shift_b)
+    return ((bitboard & mask_a) >> -shift_a) | ((bitboard & mask_b) >> -shift_b)
+
+
+def iter_squares(bitboard):
+    # Yield the index of every set bit, lowest first
+    while bitboard:
+        low = bitboard & -bitboard
+        yield low.bit_length() - 1
+        bitboard ^= low
+
+
+def _extend_jumps(origin, square, opp, empty, captured, directions, promotion, captures):
+    # Follow a capture sequence from square. Captured pieces stay on the board until the
+    # move is over, so they can be neither jumped twice nor landed on.
+    extended = False
+    for direction in directions:
+        jump = JUMPS[square][direction]
+        if jump is None:
+            continue
+        jumped, landing = jump
+        if (opp >> jumped) & 1 and not (captured >> jumped) & 1 and (empty >> landing) & 1:
+            extended = True
+            if (promotion >> landing) & 1:
+                # A man reaching the far row is crowned, which ends the move
+                captures.append((origin, landing, captured | (1 << jumped)))
+            else:
+                _extend_jumps(origin, landing, opp, empty, captured | (1 << jumped), directions, promotion, captures)
+    if not extended and captured:
+        captures.append((origin, square, captured))
+
+
+def generate_captures(own, opp, kings, color):
+    # Complete capture sequences: a piece keeps jumping while it can, men forward only, kings in
+    # every direction. Moves are (from_square, to_square, captured_mask) tuples, where to_square is
+    # the final landing square and captured_mask holds every piece taken on the way.
+    empty = ~(own | opp) & FULL_MASK
+    # Whole-board shifts find the pieces with a first jump; only those are followed square by square
+    jumpers = 0
+    for directions, movers in ((FORWARD[color], own), (BACKWARD[color], own & kings)):
+        for direction in directions:
+            landings = step(step(movers, direction) & opp, direction) & empty
+            back = OPPOSITE[direction]
+            jumpers |= step(step(landings, back), back)
+    captures = []
+    for origin in iter_squares(jumpers):
+        if (kings >> origin) & 1:
+            directions, promotion = ALL_DIRECTIONS, 0
+        else:
+            directions, promotion = FORWARD[color], PROMOTION_MASK[color]
+        # The moving piece has left its square, so a sequence may pass back over it
+        _extend_jumps(origin, origin, opp, empty | (1 << origin), 0, directions, promotion, captures)
+    if len(captures) > 1:
+        # Different jump orders taking the same pieces to the same square are one move
+        captures = list(dict.fromkeys(captures))
+    return captures
+
+
+def generate_moves(own, opp, kings, color):
+    # Non-capturing moves: men step forward, kings slide any distance
+    empty = ~(own | opp) & FULL_MASK
+    moves = []
+    men = own & ~kings
+    for direction in FORWARD[color]:
+        back = OPPOSITE[direction]
+        for target in iter_squares(step(men, direction) & empty):
+            moves.append((NEIGHBOURS[target][back], target, 0))
+    for origin in iter_squares(own & kings):
+        for direction in range(4):
+            target = step(1 << origin, direction) & empty
+            while target:
+                moves.append((origin, target.bit_length() - 1, 0))
+                target = step(target, direction) & empty
+    return moves
+
+
+def generate_legal(own, opp, kings, color):
+    # The legal moves: capturing is compulsory, so quiet moves only count when there is no capture
+    return generate_captures(own, opp, kings, color) or generate_moves(own, opp, kings, color)
+
+
+def jump_path(move):
+    # Squares a move visits, origin first: the landing square of every jump for a capture sequence
+    origin, target, captured = move
+
+    def extend(square, remaining):
+        if not remaining:
+            return [square] if square == target else None
+        for jump in JUMPS[square]:
+            if jump is not None and (remaining >> jump[0]) & 1:
+                path = extend(jump[1], remaining & ~(1 << jump[0]))
+                if path is not None:
+                    return [square] + path
+        return None
+    return (extend(origin, captured) if captured else None) or [origin, target]
+
+
+def has_moves(own, opp, kings, color):
+    # Cheap test for any move or capture without building the move lists
+    empty = ~(own | opp) & FULL_MASK
+    for direction in FORWARD[color]:
+        if step(own, direction) & empty or step(step(own, direction) & opp, direction) & empty:
+            return True
+    own_kings = own & kings
+    for direction in BACKWARD[color]:
+        if step(own_kings, direction) & empty or step(step(own_kings, direction) & opp, direction) & empty:
+            return True
+    return False
+
+
+def apply_move(own, opp, kings, move, color):
+    # Apply a move for the side owning `own` and return the new (own, opp, kings)
+    origin, target, captured = move
+    from_bit, to_bit = 1 << origin, 1 << target
+    # Clear then set, since a king's capture sequence can end on the square it started from
+    own = (own & ~from_bit) | to_bit
+    opp &= ~captured
+    if kings & from_bit:
+        kings = (kings & ~from_bit) | to_bit
+    elif to_bit & PROMOTION_MASK[color]:
+        kings |= to_bit
+    kings &= ~captured
+    return own, opp, kings
+
+
+def popcount(bitboard):
+    return bin(bitboard).count("1")
+
+
+def winner(black, white, kings, color):
+    # Same contract as GameState.is_game_over: the side to move loses when it has no legal move
+    # (which includes having no pieces left), otherwise the game goes on (None)
+    own, opp = (black, white) if color == BLACK else (white, black)
+    if not has_moves(own, opp, kings, color):
+        return WHITE if color == BLACK else BLACK
+    return None
+
+
+class Bitboard:
+    def __init__(self, black=0, white=0, kings=0):
+        # One integer mask per side plus a mask of kings (of either colour)
+        self.black = black
+        self.white = white
+        self.kings = kings
+        # Zobrist key of the piece placement (the side to move is added by GameState)
+        self.hash = hash_position(black, white, kings)
+
+    def copy(self):
+        bitboard = Bitboard.__new__(Bitboard)
+        bitboard.black, bitboard.white, bitboard.kings, bitboard.hash = self.black, self.white, self.kings, self.hash
+        return bitboard
+
+    def set_square(self, row, col, piece):
+        # Mirror a Tile.set_piece call: clear the square, then place the piece (if any)
+        square = coords_to_square(row, col)
+        if square is None:
+            return
+        bit = 1 << square
+        if (self.black | self.white) & bit:
+            # XOR the old piece out of the key before clearing the square
+            self.hash ^= PIECE_KEYS[piece_kind(BLACK if self.black & bit else WHITE, self.kings & bit)][square]
+        self.black &= ~bit
+        self.white &= ~bit
+        self.kings &= ~bit
+        if piece:
+            if piece.color == BLACK:
+                self.black |= bit
+            else:
+                self.white |= bit
+            if piece.king:
+                self.kings |= bit
+            self.hash ^= PIECE_KEYS[piece_kind(piece.color, piece.king)][square]
+
+    def sides(self, color):
+        # Return (own, opponent) masks for a colour
+        return (self.black, self.white) if color == BLACK else (self.white, self.black)
+
+    def get_legal(self, color):
+        own, opp = self.sides(color)
+        return generate_legal(own, opp, self.kings, color)
+
+    def has_moves(self, color):
+        own, opp = self.sides(color)
+        return has_moves(own, opp, self.kings, color)
+
+    def apply(self, move, color):
+        # Apply a move in place
+        own, opp = self.sides(color)
+        kings = self.kings
+        own, opp, self.kings = apply_move(own, opp, kings, move, color)
+        # update_key also flips the side to move, which the placement key leaves out
+        self.hash = update_key(self.hash, move, color, kings, self.kings) ^ SIDE_KEY
+        if color == BLACK:
+            self.black, self.white = own, opp
+        else:
+            self.white, self.black = own, opp
+
+    def winner(self, color):
+        return winner(self.black, self.white, self.kings, color)
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+# Command-line client for Server.py. Sends JSON-line requests and prints the
+# replies, or with --demo plays many concurrent games of random moves against
+# the server's AI and prints the server statistics at the end.
+
+
+async def connect(host, port, unix):
+    if unix:
+        return await asyncio.open_unix_connection(unix)
+    return await asyncio.open_connection(host, port)
+
+
+async def request(reader, writer, message):
+    # Send one request and wait for its reply
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("server closed the connection")
+    return json.loads(line)
+
+
+async def demo_game(address, index, engine, time_limit, seed):
+    # One connection, one game: random legal moves as BLACK against the AI as WHITE.
+    # Refused requests ("server busy") are sent again after a short pause.
+    rng = random.Random(seed + index)
+    reader, writer = await connect(*address)
+    try:
+        reply = await request(reader, writer, {"cmd": "new", "ai": "white", "engine": engine,
+                                               "time_limit": time_limit})
+        game, retries = reply.get("game"), 0
+        while reply["ok"] and reply["result"] == "*" and reply["legal"]:
+            move = rng.choice(reply["legal"])
+            while True:
+                reply_to_move = await request(reader, writer, {"cmd": "move", "game": game, "move": move})
+                if reply_to_move["ok"] or not reply_to_move["error"].startswith("server busy"):
+                    break
+                retries += 1
+                await asyncio.sleep(0.05)
+            reply = reply_to_move
+        return reply, retries
+    finally:
+        writer.close()
+
+
+async def demo(address, games, engine, time_limit, seed):
+    start = time.perf_counter()
+    finished = await asyncio.gather(*(demo_game(address, index, engine, time_limit, seed) for index in range(games)))
+    elapsed = time.perf_counter() - start
+    results = {}
+    for reply, _ in finished:
+        key = reply["result"] if reply["ok"] else "error: " + reply["error"]
+        results[key] = results.get(key, 0) + 1
+    retries = sum(retries for _, retries in finished)
+    print(f"{games} games in {elapsed:.1f}s, results {results}, {retries} busy retries")
+    reader, writer = await connect(*address)
+    try:
+        print(json.dumps(await request(reader, writer, {"cmd": "stats"}), indent=2))
+    finally:
+        writer.close()
+
+
+async def send_lines(address, lines):
+    # Send each JSON line and print its reply; lines that are not JSON are reported and skipped
+    reader, writer = await connect(*address)
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as error:
+                print(f"skipping bad JSON {line!r}: {error}", file=sys.stderr)
+                continue
+            print(json.dumps(await request(reader, writer, message)))
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talk to a checkers Server.py.")
+    parser.add_argument("requests", nargs="*",
+                        help='JSON requests to send, e.g. \'{"cmd": "stats"}\' (default: read lines from stdin)')
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=8765, help="server TCP port")
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--demo", type=int, default=0, metavar="GAMES",
+                        help="play this many concurrent random games against the AI")
+    parser.add_argument("--engine", default="alphabeta", help="AI engine for --demo games")
+    parser.add_argument("--time-limit", type=float, default=0.05, help="AI seconds per move in --demo games")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --demo moves")
+    args = parser.parse_args()
+
+    address = (args.host, args.port, args.unix)
+    if args.demo:
+        asyncio.run(demo(address, args.demo, args.engine, args.time_limit, args.seed))
+    else:
+        asyncio.run(send_lines(address, args.requests or sys.stdin))
+
+
+if __name__ == "__main__":
+    main()
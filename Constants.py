@@ -12,5 +12,5 @@ DARK_BROWN, LIGHT_BROWN = (139, 69, 19), (222, 184, 135)
 # Player colors
 RED, BLUE = (255, 0, 0), (0, 0, 255)
 
-# End row indices for each player
-END_ROW_BLACK, END_ROW_WHITE = 7, 0
+# Promotion row indices for each player (the far side of the board)
+END_ROW_BLACK, END_ROW_WHITE = 0, 7
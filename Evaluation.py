@@ -0,0 +1,119 @@
+import json
+from Bitboard import SQUARES, FULL_MASK, FORWARD, BACKWARD, step, square_to_coords, popcount
+from Zobrist import BLACK_MAN, BLACK_KING, WHITE_MAN, WHITE_KING, piece_kind
+from Constants import BLACK, WHITE
+
+# Static evaluation. Material, advancement, back-rank guard and centre control
+# depend only on which piece stands on which square, so they are folded into one
+# piece-square table per piece kind and kept as a running total: a move only
+# subtracts what left and adds what arrived, like the Zobrist key. Mobility
+# depends on the whole position and is computed at the leaf.
+
+DEFAULT_WEIGHTS = {
+    "man": 100,  # Material
+    "king": 160,
+    "advancement": 3,  # Per row a man has advanced from its own back row
+    "back_rank": 8,  # Man still guarding its own back row (stops the opponent crowning there)
+    "centre": 6,  # Piece on one of the four centre squares
+    "mobility": 2,  # Per square the side's pieces could step to, against the opponent's
+}
+
+BACK_ROW = {BLACK: 7, WHITE: 0}
+CENTRE = {(3, 2), (3, 4), (4, 3), (4, 5)}
+
+
+def load_weights(path):
+    # Weights from a JSON object, e.g. {"king": 150, "mobility": 0}; names left out keep their default
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def load_evaluator(weights=None):
+    # Evaluator for a search: weights is None (the defaults), a dict overriding DEFAULT_WEIGHTS, or
+    # the path of a JSON weights file or of a trained network (.npz, see Learning.py)
+    if isinstance(weights, str):
+        if weights.endswith(".npz"):
+            from Network import LearnedEvaluator  # NumPy is only needed for learned evaluation
+            return LearnedEvaluator.load(weights)
+        weights = load_weights(weights)
+    return Evaluator(weights)
+
+
+def build_tables(weights):
+    # One table per piece kind (Zobrist order), giving each square's value to the piece's owner
+    tables = [[0] * SQUARES for _ in range(4)]
+    for square in range(SQUARES):
+        row, col = square_to_coords(square)
+        centre = weights["centre"] if (row, col) in CENTRE else 0
+        for color in (BLACK, WHITE):
+            advanced = abs(row - BACK_ROW[color])
+            guard = weights["back_rank"] if row == BACK_ROW[color] else 0
+            tables[piece_kind(color, False)][square] = (weights["man"] + weights["advancement"] * advanced
+                                                        + guard + centre)
+            tables[piece_kind(color, True)][square] = weights["king"] + centre
+    return tuple(tuple(table) for table in tables)
+
+
+class Evaluator:
+    batched = False  # Leaves are scored one at a time (see Network.LearnedEvaluator)
+
+    def __init__(self, weights=None):
+        # weights overrides any of DEFAULT_WEIGHTS
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"unknown evaluation weights: {', '.join(sorted(unknown))}")
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.tables = build_tables(self.weights)
+        self.mobility_weight = self.weights["mobility"]
+
+    def piece_value(self, color, king, square):
+        # Table value of one piece, positive for BLACK and negative for WHITE
+        value = self.tables[piece_kind(color, king)][square]
+        return value if color == BLACK else -value
+
+    def score_position(self, black, white, kings):
+        # Full (non-incremental) table score, BLACK minus WHITE; seeds and verifies the running totals
+        score = 0
+        for kind, mask, sign in ((BLACK_MAN, black & ~kings, 1), (BLACK_KING, black & kings, 1),
+                                 (WHITE_MAN, white & ~kings, -1), (WHITE_KING, white & kings, -1)):
+            table = self.tables[kind]
+            while mask:
+                low = mask & -mask
+                score += sign * table[low.bit_length() - 1]
+                mask ^= low
+        return score
+
+    def move_delta(self, move, color, kings, new_kings):
+        # Change in the mover's table score for a bitboard move: kings/new_kings are the king masks
+        # before and after (same inputs as Zobrist.update_key)
+        origin, target, captured = move
+        own_base = BLACK_MAN if color == BLACK else WHITE_MAN
+        opp_base = WHITE_MAN if color == BLACK else BLACK_MAN
+        tables = self.tables
+        delta = (tables[own_base + ((new_kings >> target) & 1)][target]
+                 - tables[own_base + ((kings >> origin) & 1)][origin])
+        while captured:
+            low = captured & -captured
+            square = low.bit_length() - 1
+            delta += tables[opp_base + ((kings >> square) & 1)][square]
+            captured ^= low
+        return delta
+
+    def mobility(self, own, opp, kings, color):
+        # Empty squares one step away from the side's pieces in the directions they may move
+        empty = ~(own | opp) & FULL_MASK
+        reach = 0
+        for direction in FORWARD[color]:
+            reach |= step(own, direction)
+        own_kings = own & kings
+        for direction in BACKWARD[color]:
+            reach |= step(own_kings, direction)
+        return popcount(reach & empty)
+
+    def evaluate(self, own, opp, kings, color, score):
+        # Leaf evaluation from the side to move's point of view, given its running table score
+        if not self.mobility_weight:
+            return score
+        other = WHITE if color == BLACK else BLACK
+        return score + self.mobility_weight * (self.mobility(own, opp, kings, color)
+                                               - self.mobility(opp, own, kings, other))
@@ -1,126 +1,118 @@
+import time
 from Visualiser import Board
+from Rules import GameState
 from Constants import BLACK, WHITE
-
-class GameState:
-    def __init__(self):
-        # Initialize the game board and game state
-        self.board = Board(tile_size=100)
-        self.current_turn = BLACK
-        self.previous_turn = None
-        self.player1_points = 0
-        self.player2_points = 0
-        self.selected_piece = None
-
-    def switch_turn(self):
-        # Switch the current turn between BLACK and WHITE
-        self.current_turn = WHITE if self.current_turn == BLACK else BLACK
-
-    def increment_points(self, color):
-        # Increment points for the player who captured a piece
-        if color == WHITE:
-            self.player1_points += 1
-        else:
-            self.player2_points += 1
-
-    def is_game_over(self):
-        # Check if the game is over and return the winner or game state
-        player1_pieces = [tile.piece for row in self.board.tiles for tile in row if tile.piece and tile.piece.color == BLACK]
-        player2_pieces = [tile.piece for row in self.board.tiles for tile in row if tile.piece and tile.piece.color == WHITE]
-
-        def has_valid_moves(player_pieces):
-            # Check if a player has any valid moves left
-            for piece in player_pieces:
-                if piece.get_possible_moves(self.board.tiles) or piece.get_possible_captures(self.board.tiles):
-                    return True
-            return False
-
-        # Check various game-over conditions
-        if not player1_pieces and not player2_pieces:
-            return 0  # Draw (no pieces left for both players)
-
-        if not player1_pieces or not has_valid_moves(player1_pieces):
-            return WHITE  # White wins
-        elif not player2_pieces or not has_valid_moves(player2_pieces):
-            return BLACK  # Black wins
-
-        if not has_valid_moves(player1_pieces) and not has_valid_moves(player2_pieces):
-            return "Stalemate"  # No valid moves for both players
-
-        return None  # Game is not over
-
-    def handle_click(self, row, col):
-        # Handle user click on the board
-        clicked_tile = self.board.tiles[row][col]
-        clicked_tile.selected = not clicked_tile.selected
-
-        if clicked_tile.piece and clicked_tile.piece.color == self.current_turn:
-            # Select the clicked piece
-            if self.selected_piece:
-                self.selected_piece.tile.selected = False
-
-            self.selected_piece = clicked_tile.piece
-        elif self.selected_piece:
-            # Try to move the selected piece to the clicked tile
-            self.try_move(self.selected_piece, row, col)
-
-    def try_move(self, piece, new_row, new_col):
-        # Attempt to move a piece to a new position
-        if piece.is_valid_move(new_row, new_col, self.board.tiles):
-            self.move_piece(piece, new_row, new_col)
-            if abs(new_row - piece.row) == 2 and abs(new_col - piece.col) == 2:
-                # Capture opponent's piece if it's a jump move
-                self.capture_opponent(piece, new_row, new_col)
-
-            # Check if the piece should be promoted to a king
-            if piece.color == BLACK and new_row == 7:
-                piece.make_king()
-            elif piece.color == WHITE and new_row == 0:
-                piece.make_king()
-
-            self.switch_turn()
-            self.selected_piece = None
-
-    def move_piece(self, piece, new_row, new_col):
-        # Move a piece to a new position on the board
-        self.board.tiles[piece.row][piece.col].set_piece(None)
-        piece.row = new_row
-        piece.col = new_col
-        self.board.tiles[new_row][new_col].set_piece(piece)
-
-    def capture_opponent(self, piece, new_row, new_col):
-        # Capture an opponent's piece during a jump move
-        opponent_color = WHITE if piece.color == BLACK else BLACK
-        mid_row = (piece.row + new_row) // 2
-        mid_col = (piece.col + new_col) // 2
-
-        if abs(new_row - piece.row) == 2 and abs(new_col - piece.col) == 2:
-            if (
-                0 <= mid_row < 8
-                and 0 <= mid_col < 8
-                and self.board.tiles[mid_row][mid_col].piece
-                and self.board.tiles[mid_row][mid_col].piece.color == opponent_color
-            ):
-                self.board.tiles[mid_row][mid_col].set_piece(None)
-                self.increment_points(opponent_color)
-
+from AI_Worker import AIWorker
+from PDN import PDNRecorder, result_text
 
 class Game:
-    def __init__(self, screen, ai_mode=False, ai_player=None):
+    def __init__(self, screen, ai_mode=False, ai_player=None, ponder=False):
         # Initialize the game with screen, AI mode, and AI player
         self.screen = screen
-        self.state = GameState()
+        self.state = GameState(board=Board(tile_size=100))
         self.ai_mode = ai_mode
         self.ai_player = ai_player
-
-    def update(self, events):
-        # Update the game state and handle events
-        self.state.board.draw(self.screen)
-        self.state.board.handle_events(events)
-
+        # The AI thinks in a background worker so the window keeps rendering and handling input
+        self.ai_worker = AIWorker(ai_player, ponder=ponder) if ai_mode else None
+        self.searched_key = None  # Position the last AI search was started for
+        self.profiler = None  # Optional Profiler whose overlay is shown in the top bar
+        self.overlay_refreshed = 0.0
+        # Every game is recorded so it can be saved as PDN
+        ai_name = type(ai_player).__name__ if ai_mode else "Human"
+        self.state.recorder = PDNRecorder(black=ai_name if ai_mode and ai_player.color == BLACK else "Human",
+                                          white=ai_name if ai_mode and ai_player.color == WHITE else "Human")
+
+    def update(self):
+        # Redraw and advance the AI; returns the screen rects that were redrawn (clicks arrive through
+        # handle_click)
+        dirty_rects = self.state.board.draw(self.screen)
+
+        if self.ai_mode:
+            self.update_ai()
+        self.update_overlay()
+        return dirty_rects
+
+    def update_overlay(self):
+        # Refresh the performance overlay twice a second (every refresh repaints the top bar)
+        board = self.state.board
+        if self.profiler is None or not self.profiler.overlay:
+            board.overlay_text = ""
+            return
+        now = time.perf_counter()
+        if now - self.overlay_refreshed < 0.5 and board.overlay_text:
+            return
+        self.overlay_refreshed = now
+        board.overlay_text = self.profiler.overlay_text(self.ai_nodes_per_second())
+
+    def ai_nodes_per_second(self):
+        # Live rate of the running search, else the rate reported by the last one
+        if not self.ai_mode:
+            return None
+        worker = self.ai_worker
+        if worker.thinking() and worker.nodes() is not None and worker.elapsed() > 0:
+            return int(worker.nodes() / worker.elapsed())
+        report = getattr(self.ai_player, "last_report", None) or {}
+        return report.get("nps", report.get("rollouts_per_second"))
+
+    def is_busy(self):
+        # True when the next frame has work to do: pending redraws or an AI move in progress
+        if self.state.board.dirty_tiles:
+            return True
         if self.ai_mode and self.state.current_turn == self.ai_player.color:
-            # Make AI move if it's AI's turn
-            self.ai_player.make_move(self.state)
+            return self.ai_worker.thinking() or self.searched_key != self.state.zobrist_key
+        return False
+
+    def update_ai(self):
+        # Start, poll or ponder the background AI search without blocking the frame
+        worker = self.ai_worker
+        board = self.state.board
+        if self.state.current_turn == self.ai_player.color:
+            if worker.thinking():
+                move = worker.poll(self.state)
+                if move is not None:
+                    # Make AI move once it's ready
+                    self.ai_player.play_move(self.state, move)
+            elif self.searched_key != self.state.zobrist_key:
+                self.searched_key = self.state.zobrist_key
+                worker.start_search(self.state)
+        else:
+            worker.start_ponder(self.state)
+
+        if worker.thinking():
+            nodes = worker.nodes()
+            board.status_text = f"AI thinking... {worker.elapsed():.1f}s" + (f", {nodes} nodes" if nodes is not None else "")
+        else:
+            board.status_text = ""
 
     def handle_click(self, row, col):
-        # Handle user click on the game board
+        # Handle user click on the game board; the AI's pieces are off limits while it is to move
+        if self.ai_mode and self.state.current_turn == self.ai_player.color:
+            return
         self.state.handle_click(row, col)
+
+    def save_record(self, path="games.pdn"):
+        # Append the game so far to a PDN collection
+        self.state.recorder.save(path, result_text(self.state.is_game_over()))
+
+    def close(self):
+        # Stop any background AI work
+        if self.ai_worker is not None:
+            self.ai_worker.shutdown()
+
+    def undo(self):
+        # Take back the last move; against the AI also take back its reply so the human is to move
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+        self.state.undo()
+        if self.ai_mode and self.state.current_turn == self.ai_player.color:
+            self.state.undo()
+        self.searched_key = None  # A position the game comes back to gets a fresh search
+
+    def redo(self):
+        # Replay undone moves, in pairs against the AI
+        if self.ai_worker is not None:
+            self.ai_worker.cancel()
+        self.state.redo()
+        if self.ai_mode and self.state.current_turn == self.ai_player.color:
+            self.state.redo()
+        self.searched_key = None
@@ -0,0 +1,129 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from AlphaBeta_Player import AlphaBetaPlayer, SearchTimeout, MAX_DEPTH
+from Bitboard import generate_legal
+from TranspositionTable import TranspositionTable
+from Zobrist import hash_position, side_key
+from Constants import BLACK
+
+# Lazy SMP: helper processes search the same root as the main search, sharing
+# one transposition table in shared memory. Helpers start at staggered depths
+# and take the root moves in a different order, so they fill the table with
+# results the main search then finds instead of computing them itself.
+
+_helper = None  # The helper process's search player
+_stop = None  # Shared stop flag: the main search sets byte 0 when it is done
+
+
+class HelperPlayer(AlphaBetaPlayer):
+    def check_budget(self):
+        # Helpers also stop as soon as the main search has finished
+        if _stop.buf[0]:
+            raise SearchTimeout()
+        super().check_budget()
+
+
+def _init_helper(tt_name, tt_memory_mb, stop_name, color, max_depth, weights):
+    # Process pool initializer: attach to the shared table and stop flag
+    global _helper, _stop
+    _stop = shared_memory.SharedMemory(name=stop_name)
+    _helper = HelperPlayer(color, time_limit=None, max_depth=max_depth, tt_memory_mb=0, weights=weights)
+    _helper.tt = TranspositionTable.attach(tt_name, tt_memory_mb)
+
+
+def _helper_search(position, time_limit, age, index):
+    # Search a position (GameState.encode format) until the time is up or the main search stops.
+    # Returns the nodes searched.
+    black, white, kings, color = position
+    player = _helper
+    player.nodes = 0
+    player.stop_requested = False
+    player.tt.age = age
+    player.killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+    player.deadline = time.perf_counter() + time_limit if time_limit else None
+    own, opp = (black, white) if color == BLACK else (white, black)
+    root_moves = generate_legal(own, opp, kings, color)
+    if not root_moves:
+        return 0
+    shift = index % len(root_moves)
+    root_moves = root_moves[shift:] + root_moves[:shift]
+    key = hash_position(black, white, kings, color)
+    for depth in range(1 + index % 2, player.max_depth + 1):
+        try:
+            player.search_root(own, opp, kings, color, key, depth, root_moves)
+        except SearchTimeout:
+            break
+    return player.nodes
+
+
+class LazySMPPlayer(AlphaBetaPlayer):
+    def __init__(self, color, workers=None, time_limit=0.016, node_limit=None, max_depth=MAX_DEPTH,
+                 tt_memory_mb=16, tablebase=None, book=None, weights=None, verbose=False):
+        # Parallel AlphaBetaPlayer: workers processes in total, the main search plus workers - 1 helpers.
+        # With helpers it holds a process pool and shared memory, so unlike the other players it cannot be
+        # sent to a process worker, and it should be closed (or used as a context manager) when done with.
+        # With workers=1 it is a plain AlphaBetaPlayer with nothing to release.
+        super().__init__(color, time_limit, node_limit, max_depth, 0, tablebase, book, weights, verbose)
+        self.workers = workers or os.cpu_count() or 1
+        self.tt = TranspositionTable(tt_memory_mb, shared=self.workers > 1)
+        self.stop_flag = None
+        self.pool = None
+        if self.workers > 1:
+            self.stop_flag = shared_memory.SharedMemory(create=True, size=8)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers - 1, initializer=_init_helper,
+                                            initargs=(self.tt.name, tt_memory_mb, self.stop_flag.name, color,
+                                                      max_depth, weights))
+
+    def choose_move(self, bitboard, color):
+        # Start the helpers on the same position, run the main search, then stop the helpers
+        futures = []
+        in_book = self.book is not None and bool(self.book.lookup(bitboard.hash ^ side_key(color)))
+        if self.pool is not None and not in_book:
+            self.stop_flag.buf[0] = 0
+            position = (bitboard.black, bitboard.white, bitboard.kings, color)
+            # The main search bumps the table age in new_search; helpers use the age it will have
+            age = (self.tt.age + 1) & 0xFF
+            futures = [self.pool.submit(_helper_search, position, self.time_limit, age, index)
+                       for index in range(1, self.workers)]
+        try:
+            move = super().choose_move(bitboard, color)
+        finally:
+            if futures:
+                self.stop_flag.buf[0] = 1
+            helper_nodes = sum(future.result() for future in futures)
+        if self.last_report is not None and futures:
+            elapsed = self.last_report["time"]
+            self.last_report["workers"] = self.workers
+            self.last_report["helper_nodes"] = helper_nodes
+            self.last_report["total_nps"] = int((self.nodes + helper_nodes) / elapsed) if elapsed > 0 else 0
+        return move
+
+    def request_stop(self):
+        super().request_stop()
+        if self.stop_flag is not None:
+            self.stop_flag.buf[0] = 1
+
+    def close(self):
+        # Shut the helpers down and free the shared memory; safe to call more than once
+        if self.pool is not None:
+            self.stop_flag.buf[0] = 1
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.tt.close()
+        if self.stop_flag is not None:
+            self.stop_flag.close()
+            self.stop_flag.unlink()
+            self.stop_flag = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        # Fallback for players nobody closed; the attributes are missing if __init__ failed part way
+        if getattr(self, "stop_flag", None) is not None and hasattr(self, "pool"):
+            self.close()
@@ -0,0 +1,281 @@
+import argparse
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from AI_Player import AIPlayer
+from AlphaBeta_Player import AlphaBetaPlayer
+from Benchmark import sample_positions
+from Network import Network, LearnedEvaluator, position_features
+from Perft import position_state
+from Tournament import run_tournament
+from Tablebase import RULES_VERSION
+from Rules import GameState
+from Constants import BLACK, WHITE
+
+# Training pipeline for the learned evaluation (Network.py):
+#
+#   python Learning.py selfplay -n 2000 -o selfplay.dat   play games, append positions and results
+#   python Learning.py train selfplay.dat -o network.npz  fit the network on CPU in mini-batches
+#   python Learning.py bench network.npz                  time to depth and a match against the hand evaluation
+#
+# The search AI loads a trained network at startup with weights="network.npz"
+# (Main.py --weights, Tournament.py --weights-a/--weights-b).
+#
+# Self-play data is a header followed by fixed 14-byte records, one per position:
+# black, white and kings bitboards, the side to move (0 BLACK, 1 WHITE) and the
+# game's result for the side to move (1 win, 0 draw, -1 loss). Games are appended
+# as they finish and the file is memory-mapped for training.
+
+MAGIC = b"CKSP"
+HEADER = struct.Struct("<4sBxxx")  # magic, rules version
+RECORD = np.dtype([("black", "<u4"), ("white", "<u4"), ("kings", "<u4"), ("turn", "u1"), ("result", "i1")])
+
+
+def open_data(path):
+    # Open a self-play file for appending, writing the header if it is new
+    out = open(path, "ab")
+    if out.tell() == 0:
+        out.write(HEADER.pack(MAGIC, RULES_VERSION))
+    else:
+        load_data(path)  # Refuse to append to a file from other rules
+    return out
+
+
+def load_data(path):
+    # The records of a self-play file, memory-mapped
+    with open(path, "rb") as stream:
+        magic, version = HEADER.unpack(stream.read(HEADER.size))
+    if magic != MAGIC or version != RULES_VERSION:
+        raise ValueError(f"{path} is not self-play data for rules version {RULES_VERSION}")
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+
+
+def self_play_game(index, depth, random_plies, max_moves, no_progress_limit, seed):
+    # One game: the random AIPlayer opens for variety, then the search plays both sides to a fixed
+    # depth (depth 0 leaves the whole game to the AIPlayer). Returns the positions as RECORD rows.
+    random.seed(seed + index)
+    opener = AIPlayer(BLACK)
+    engines = {color: AlphaBetaPlayer(color, time_limit=None, max_depth=depth, tt_memory_mb=1)
+               for color in (BLACK, WHITE)} if depth else None
+    state = GameState()
+    positions = []
+    quiet_plies = 0
+    winner = state.is_game_over()
+    while winner is None and len(state.undo_stack) < max_moves and quiet_plies < no_progress_limit:
+        color = state.current_turn
+        bitboard = state.board.bitboard
+        if engines is None or len(state.undo_stack) < random_plies:
+            move = opener.choose_move(bitboard, color)
+        else:
+            move = engines[color].choose_move(bitboard, color)
+        if move is None:
+            break
+        positions.append(state.encode())
+        played = len(state.undo_stack)
+        opener.play_move(state, move)
+        if len(state.undo_stack) == played:
+            break
+        # Captures, promotions and man moves are progress; king shuffles are not (as in Tournament.py)
+        piece, _, _, _, _, captured, promoted, _ = state.undo_stack[-1]
+        quiet_plies = 0 if captured or promoted or not piece.king else quiet_plies + 1
+        winner = state.is_game_over()
+
+    records = np.array([(black, white, kings, 0 if color == BLACK else 1,
+                         0 if winner not in (BLACK, WHITE) else (1 if winner == color else -1))
+                        for black, white, kings, color in positions], dtype=RECORD)
+    return records, winner if winner in (BLACK, WHITE) else 0
+
+
+def self_play(path, games, depth=4, random_plies=6, max_moves=200, no_progress_limit=50, seed=0, workers=None,
+              progress=print):
+    # Play games over a process pool and append each one's positions to path as soon as it finishes
+    results = {BLACK: 0, WHITE: 0, 0: 0}
+    positions = 0
+    start = time.perf_counter()
+    with open_data(path) as out, ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(self_play_game, index, depth, random_plies, max_moves, no_progress_limit, seed)
+                   for index in range(games)]
+        for finished, future in enumerate(as_completed(futures), 1):
+            records, winner = future.result()
+            records.tofile(out)
+            out.flush()
+            results[winner] += 1
+            positions += len(records)
+            if finished % 50 == 0 or finished == games:
+                progress(f"{finished}/{games} games, {positions} positions, {time.perf_counter() - start:.1f}s")
+    return {"games": games, "positions": positions, "black": results[BLACK], "white": results[WHITE],
+            "draws": results[0], "seconds": round(time.perf_counter() - start, 1)}
+
+
+def batch_inputs(records):
+    # Network inputs and targets for a slice of records
+    x = position_features(records["black"], records["white"], records["kings"], records["turn"])
+    return x, records["result"].astype(np.float32)
+
+
+def validation_loss(network, records, batch_size=4096):
+    # Mean squared error, and how often a decisive result is predicted with the right sign
+    loss, correct, decisive = 0.0, 0, 0
+    for start in range(0, len(records), batch_size):
+        x, y = batch_inputs(records[start:start + batch_size])
+        output = network.forward(x)
+        loss += float(np.sum((output - y) ** 2))
+        correct += int(np.sum((output * y) > 0))
+        decisive += int(np.count_nonzero(y))
+    return loss / max(1, len(records)), correct / max(1, decisive)
+
+
+def train(network, data, epochs=10, batch_size=256, learning_rate=0.002, validation=0.1, seed=0, progress=print):
+    # Mini-batch Adam on the squared error between the network's output and the game results.
+    # A slice of the data is held out and the weights of the best validation epoch are kept.
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(data))
+    held_out = int(len(data) * validation)
+    validation_records = data[np.sort(order[:held_out])] if held_out else None
+    training = order[held_out:]
+    first_moments = {name: np.zeros_like(value) for name, value in network.params.items()}
+    second_moments = {name: np.zeros_like(value) for name, value in network.params.items()}
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    steps = 0
+    best, history = None, []
+    for epoch in range(1, epochs + 1):
+        start = time.perf_counter()
+        rng.shuffle(training)
+        total = 0.0
+        for first in range(0, len(training), batch_size):
+            # Sorted indices read the memory-mapped file front to back
+            x, y = batch_inputs(data[np.sort(training[first:first + batch_size])])
+            loss, grads = network.gradients(x, y)
+            total += loss * len(x)
+            steps += 1
+            for name, grad in grads.items():
+                first_moments[name] = beta1 * first_moments[name] + (1 - beta1) * grad
+                second_moments[name] = beta2 * second_moments[name] + (1 - beta2) * grad * grad
+                corrected_first = first_moments[name] / (1 - beta1 ** steps)
+                corrected_second = second_moments[name] / (1 - beta2 ** steps)
+                network.params[name] = (network.params[name] - learning_rate * corrected_first
+                                        / (np.sqrt(corrected_second) + epsilon)).astype(np.float32)
+        report = {"epoch": epoch, "loss": total / max(1, len(training)), "seconds": time.perf_counter() - start}
+        if validation_records is not None:
+            report["validation_loss"], report["validation_accuracy"] = validation_loss(network, validation_records)
+            if best is None or report["validation_loss"] < best[0]:
+                best = (report["validation_loss"], {name: value.copy() for name, value in network.params.items()})
+        history.append(report)
+        progress(f"epoch {epoch}: loss {report['loss']:.4f}"
+                 + (f", validation loss {report['validation_loss']:.4f}, decisive results called right "
+                    f"{100 * report['validation_accuracy']:.1f}%" if validation_records is not None else "")
+                 + f" ({report['seconds']:.1f}s)")
+    if best is not None:
+        network.params = best[1]
+    return history
+
+
+def search_time(weights, positions, depth, batched=True):
+    # Time to search every position to a fixed depth with an evaluation. Batching scores leaves that
+    # alpha-beta would have cut off, so time to depth, not nodes per second, is the fair comparison;
+    # nodes count the leaves the search reached and batched_leaves all the leaves evaluated in batches.
+    player = AlphaBetaPlayer(BLACK, time_limit=None, max_depth=depth, tt_memory_mb=4, weights=weights)
+    if isinstance(player.evaluator, LearnedEvaluator):
+        player.evaluator.batched = batched
+    nodes, batched_leaves, elapsed = 0, 0, 0.0
+    for position in positions:
+        state = position_state(position)
+        player.tt.clear()  # Every search starts from an empty table; the clearing itself is not timed
+        start = time.perf_counter()
+        player.choose_move(state.board.bitboard, state.current_turn)
+        elapsed += time.perf_counter() - start
+        nodes += player.nodes
+        batched_leaves += player.last_report["batched_leaves"]
+    return {"seconds": round(elapsed, 3), "nodes": nodes, "batched_leaves": batched_leaves,
+            "nps": int(nodes / elapsed)}
+
+
+def benchmark(network_path, depth=6, searches=20, games=20, time_limit=0.05, output="learned.jsonl", workers=None,
+              seed=0):
+    # Time to a fixed depth with the hand-written evaluation and with the network (batched and one
+    # leaf at a time), then a match between the two (the network is engine A)
+    positions = [position for position in sample_positions(searches * 10, seed + 1)[::10]
+                 if position_state(position).is_game_over() is None]
+    speed = {
+        "hand": search_time(None, positions, depth),
+        "learned_batched": search_time(network_path, positions, depth),
+        "learned_per_leaf": search_time(network_path, positions, depth, batched=False),
+    }
+    match = run_tournament("alphabeta", "alphabeta", games, output, workers, time_limit, seed=seed,
+                           weights_a=network_path) if games else None
+    return {"speed": speed, "match": match}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play data, training and benchmarks for the learned evaluation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play = commands.add_parser("selfplay", help="play games and append their positions to a data file")
+    play.add_argument("-n", "--games", type=int, default=1000, help="number of games")
+    play.add_argument("-o", "--output", default="selfplay.dat", help="data file (appended to)")
+    play.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    play.add_argument("--depth", type=int, default=4, help="search depth per move (0: random moves only)")
+    play.add_argument("--random-plies", type=int, default=6, help="random opening plies for variety")
+    play.add_argument("--max-moves", type=int, default=200, help="plies before the game counts as a draw")
+    play.add_argument("--seed", type=int, default=0, help="base random seed")
+
+    fit = commands.add_parser("train", help="train a network on self-play data")
+    fit.add_argument("data", help="self-play data file")
+    fit.add_argument("-o", "--output", default="network.npz", help="trained weights (.npz)")
+    fit.add_argument("--hidden", type=int, default=32, help="hidden units (0: linear evaluator)")
+    fit.add_argument("--resume", default=None, help="start from these weights instead of random ones")
+    fit.add_argument("--epochs", type=int, default=10, help="passes over the data")
+    fit.add_argument("--batch-size", type=int, default=256, help="positions per mini-batch")
+    fit.add_argument("--learning-rate", type=float, default=0.002, help="Adam step size")
+    fit.add_argument("--validation", type=float, default=0.1, help="share of the positions held out")
+    fit.add_argument("--seed", type=int, default=0, help="random seed")
+
+    bench = commands.add_parser("bench", help="compare a trained network with the hand-written evaluation")
+    bench.add_argument("network", help="trained weights (.npz)")
+    bench.add_argument("--depth", type=int, default=6, help="search depth for the time-to-depth test")
+    bench.add_argument("--searches", type=int, default=20, help="positions searched in the time-to-depth test")
+    bench.add_argument("-n", "--games", type=int, default=20, help="match games (0: time-to-depth test only)")
+    bench.add_argument("--time-limit", type=float, default=0.05, help="seconds per move in the match")
+    bench.add_argument("-o", "--output", default="learned.jsonl", help="match results file")
+    bench.add_argument("-j", "--workers", type=int, default=None, help="match worker processes")
+    bench.add_argument("--seed", type=int, default=0, help="base random seed")
+    args = parser.parse_args()
+
+    if args.command == "selfplay":
+        report = self_play(args.output, args.games, args.depth, args.random_plies, args.max_moves, seed=args.seed,
+                           workers=args.workers)
+        print(f"{report['positions']} positions from {report['games']} games in {report['seconds']}s "
+              f"(BLACK {report['black']}, WHITE {report['white']}, draws {report['draws']}) appended to {args.output}")
+    elif args.command == "train":
+        data = load_data(args.data)
+        if not len(data):
+            parser.error(f"{args.data} holds no positions")
+        network = Network.load(args.resume) if args.resume else Network(args.hidden, args.seed)
+        print(f"training on {len(data)} positions, {network.hidden or 'no'} hidden units")
+        train(network, data, args.epochs, args.batch_size, args.learning_rate, args.validation, args.seed)
+        network.save(args.output)
+        print(f"weights written to {args.output}")
+    else:
+        report = benchmark(args.network, args.depth, args.searches, args.games, args.time_limit, args.output,
+                           args.workers, args.seed)
+        for name, speed in report["speed"].items():
+            print(f"{name:18} {speed['seconds']:>8.3f}s to depth {args.depth}, {speed['nodes']} nodes "
+                  f"({speed['nps']} nodes/s), {speed['batched_leaves']} leaves evaluated in batches")
+        match = report["match"]
+        if match is not None:
+            print(f"network vs hand-written: +{match['wins']} ={match['draws']} -{match['losses']} "
+                  f"in {match['games']} games")
+            if match["elo"] is None or match["elo_error"] is None:
+                print("Elo difference: not measurable (one side won or lost every game)")
+            else:
+                print(f"Elo difference: {match['elo']:+.0f} +/- {match['elo_error']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import math
+import random
+import time
+from AI_Player import AIPlayer
+from Bitboard import generate_legal, apply_move, winner
+from Constants import BLACK, WHITE
+
+OPPONENT = {BLACK: WHITE, WHITE: BLACK}
+
+
+def legal_moves(black, white, kings, color):
+    # Legal moves for the side to move (captures are compulsory)
+    own, opp = (black, white) if color == BLACK else (white, black)
+    return generate_legal(own, opp, kings, color)
+
+
+def play(black, white, kings, move, color):
+    # Apply a move and return the new (black, white, kings)
+    if color == BLACK:
+        black, white, kings = apply_move(black, white, kings, move, color)
+    else:
+        white, black, kings = apply_move(white, black, kings, move, color)
+    return black, white, kings
+
+
+class MCTSNode:
+    def __init__(self, position, color, move=None, parent=None):
+        # position is (black, white, kings) with `color` to move; move is the one that led here
+        self.position = position
+        self.color = color
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.result = winner(*position, color)
+        self.untried = legal_moves(*position, color) if self.result is None else []
+        self.visits = 0
+        self.wins = 0.0  # From the point of view of the player who made `move`
+
+    def select_child(self, exploration):
+        # UCT: balance the child's win rate against how rarely it has been tried
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def expand(self):
+        move = self.untried.pop(random.randrange(len(self.untried)))
+        child = MCTSNode(play(*self.position, move, self.color), OPPONENT[self.color], move, self)
+        self.children.append(child)
+        return child
+
+
+class MCTSPlayer(AIPlayer):
+    def __init__(self, color, time_limit=0.5, exploration=1.4, rollout_limit=150, book=None, verbose=False):
+        # Monte Carlo Tree Search (UCT) player. Playouts run on plain bitboard integers,
+        # time_limit is the wall-clock budget per move and the tree is kept between moves;
+        # book is an optional OpeningBook consulted before searching.
+        super().__init__(color, book)
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.verbose = verbose
+        self.root = None
+        self.last_report = None  # Rollouts, rollouts per second and whether the tree was reused
+
+    def make_move(self, game_state):
+        bitboard = game_state.board.bitboard
+        move = self.choose_move(bitboard, game_state.current_turn)
+        if move is not None:
+            self.play_move(game_state, move)
+
+    def choose_move(self, bitboard, color):
+        book_move = self.book_move(bitboard, color)
+        if book_move is not None:
+            self.root = None
+            return book_move
+
+        position = (bitboard.black, bitboard.white, bitboard.kings)
+        root, reused = self.find_root(position, color), True
+        if root is None:
+            root, reused = MCTSNode(position, color), False
+        root.parent = None
+        if root.result is not None or (not root.untried and not root.children):
+            self.root = None
+            return None
+
+        self.nodes = 0
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+        # At least one iteration, so there is a move to return even when stopped or out of time at once
+        while not root.children or (time.perf_counter() < deadline and not self.stop_requested):
+            self.run_iteration(root)
+            self.nodes += 1
+        rollouts = self.nodes
+
+        elapsed = time.perf_counter() - start
+        best = max(root.children, key=lambda child: child.visits)
+        # Keep the chosen subtree for the next move
+        self.root = best
+        self.last_report = {
+            "rollouts": rollouts,
+            "time": elapsed,
+            "rollouts_per_second": int(rollouts / elapsed) if elapsed > 0 else 0,
+            "root_visits": root.visits,
+            "tree_reused": reused,
+            "win_rate": best.wins / best.visits,
+        }
+        if self.verbose:
+            print(f"MCTS: {rollouts} rollouts, {self.last_report['rollouts_per_second']} rollouts/s, "
+                  f"win rate {self.last_report['win_rate']:.2f}, tree reused: {reused}")
+        return best.move
+
+    def ponder(self, bitboard, color):
+        # Grow the tree for the opponent's position until stopped; their reply will
+        # then be one of this root's children, which find_root picks up
+        position = (bitboard.black, bitboard.white, bitboard.kings)
+        root = self.find_root(position, color) or MCTSNode(position, color)
+        root.parent = None
+        self.root = root
+        if root.result is not None:
+            return
+        while not self.stop_requested:
+            self.run_iteration(root)
+
+    def find_root(self, position, color):
+        # Look for the current position among the kept subtree and its children (the opponent's replies)
+        if self.root is None:
+            return None
+        for node in [self.root] + self.root.children:
+            if node.position == position and node.color == color:
+                return node
+        return None
+
+    def run_iteration(self, root):
+        # Selection, expansion, simulation and backpropagation
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child(self.exploration)
+        if node.untried:
+            node = node.expand()
+        result = node.result if node.result is not None else self.rollout(node.position, node.color)
+
+        while node is not None:
+            node.visits += 1
+            mover = OPPONENT[node.color]  # The player who made the move leading to this node
+            if result == mover:
+                node.wins += 1
+            elif result not in (BLACK, WHITE):
+                node.wins += 0.5
+            node = node.parent
+
+    def rollout(self, position, color):
+        # Random playout, like the baseline AIPlayer; returns the winner or 0 if the playout is cut off.
+        # The side to move loses when it is stuck, as in the full winner check.
+        black, white, kings = position
+        for _ in range(self.rollout_limit):
+            if color == BLACK:
+                own, opp = black, white
+            else:
+                own, opp = white, black
+            moves = generate_legal(own, opp, kings, color)
+            if not moves:
+                return OPPONENT[color]
+            own, opp, kings = apply_move(own, opp, kings, random.choice(moves), color)
+            if color == BLACK:
+                black, white = own, opp
+            else:
+                white, black = own, opp
+            color = OPPONENT[color]
+        return 0
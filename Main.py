@@ -1,12 +1,32 @@
+import argparse
+import time
 import pygame
 from Game import Game
 from AI_Player import AIPlayer
+from AlphaBeta_Player import AlphaBetaPlayer
+from OpeningBook import OpeningBook
+from Profiler import Profiler
 from Constants import WIDTH, HEIGHT, BLACK, WHITE
 
 class Main:
-    def __init__(self):
-        # Initialize Pygame and set up the game window
+    def __init__(self, fps=60, idle_fps=2, book=None, weights=None, ponder=False, profile=False, trace=None):
+        # Initialize Pygame and set up the game window.
+        # fps caps the frame rate while something is changing; when idle the loop
+        # sleeps in pygame.event.wait and wakes at most idle_fps times per second.
+        # book is an optional OpeningBook and weights an optional evaluation (JSON weights or a
+        # trained network, see Evaluation.load_evaluator) for the search AI. ponder lets the search AI
+        # think on the human's time (one core busy while waiting). profile installs the timing
+        # hooks from the start (F3 does so on demand); trace is where the session trace is saved.
         pygame.init()
+        self.book = book
+        self.weights = weights
+        self.ponder = ponder
+        self.profiler = Profiler() if profile or trace else None
+        if self.profiler is not None:
+            self.profiler.install()
+        self.trace = trace
+        self.fps = fps
+        self.idle_timeout = max(1, 1000 // idle_fps) if idle_fps > 0 else 0
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT + 100))
         pygame.display.set_caption("Checkers Game")
         self.clock = pygame.time.Clock()
@@ -17,6 +37,7 @@ class Main:
         # Main game loop
         while self.mode is None:
             self.show_menu()
+        self.game.profiler = self.profiler
         self.game_loop()
 
     def show_menu(self):
@@ -26,12 +47,15 @@ class Main:
         # Draw menu options
         pvp_text = self.font.render("Player vs Player", True, (0, 0, 0))
         pvai_text = self.font.render("Player vs AI", True, (0, 0, 0))
+        pvsearch_text = self.font.render("Player vs Search AI", True, (0, 0, 0))
         self.screen.blit(pvp_text, (WIDTH // 2 - pvp_text.get_width() // 2, HEIGHT // 2 - 50))
         self.screen.blit(pvai_text, (WIDTH // 2 - pvai_text.get_width() // 2, HEIGHT // 2 + 50))
+        self.screen.blit(pvsearch_text, (WIDTH // 2 - pvsearch_text.get_width() // 2, HEIGHT // 2 + 150))
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
+        # The menu is static, so block until something happens instead of spinning
+        for event in self.wait_for_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 exit()
@@ -46,31 +70,98 @@ class Main:
                     elif HEIGHT // 2 + 50 <= mouse_y <= HEIGHT // 2 + 50 + pvai_text.get_height():
                         self.mode = 'pvai'
                         self.game = Game(self.screen, ai_mode=True, ai_player=AIPlayer(BLACK))
+                # Check if Player vs Search AI option is clicked
+                if WIDTH // 2 - pvsearch_text.get_width() // 2 <= mouse_x <= WIDTH // 2 + pvsearch_text.get_width() // 2:
+                    if HEIGHT // 2 + 150 <= mouse_y <= HEIGHT // 2 + 150 + pvsearch_text.get_height():
+                        self.mode = 'pvai'
+                        ai_player = AlphaBetaPlayer(BLACK, time_limit=1.0, book=self.book, weights=self.weights,
+                                                    verbose=True)
+                        self.game = Game(self.screen, ai_mode=True, ai_player=ai_player, ponder=self.ponder)
 
     def game_loop(self):
         # Main game loop for handling events and updating the game state
         running = True
         while running:
-            events = pygame.event.get()  # Get the current events
+            if self.profiler is not None:
+                self.profiler.frame()
+            if self.game.is_busy():
+                # Something is changing (redraws pending, AI thinking): run at the frame cap
+                self.clock.tick(self.fps)
+                events = pygame.event.get()  # Get the current events
+            else:
+                events = self.wait_for_events()
             for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     self.handle_mouse_click()  # Call the handle_mouse_click method
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_u:
+                    self.game.undo()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+                    self.game.redo()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                    self.game.save_record()
+                elif event.type == pygame.KEYDOWN and event.key in (pygame.K_F3, pygame.K_F4, pygame.K_F5):
+                    self.handle_profiler_key(event.key)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.game.state.board.mark_all_dirty()
+
+            # Redraw and advance the game; only the redrawn areas are pushed to the display
+            dirty_rects = self.game.update()
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+
+        # Stop the background AI before leaving
+        self.game.close()
+        if self.profiler is not None and self.trace:
+            self.profiler.export(self.trace)
 
-            # Call Game.update with events
-            self.game.update(events)
+    def handle_profiler_key(self, key):
+        # F3 toggles the performance overlay, F4 starts/stops a cProfile dump, F5 saves the trace so far
+        if self.profiler is None:
+            self.profiler = Profiler()
+            self.profiler.install()
+            self.game.profiler = self.profiler
+        if key == pygame.K_F3:
+            self.profiler.overlay = not self.profiler.overlay
+        elif key == pygame.K_F4:
+            path = self.profiler.toggle_cprofile()
+            if path:
+                print(f"cProfile stats written to {path}")
+        else:
+            path = self.trace or time.strftime("trace-%Y%m%d-%H%M%S.json")
+            self.profiler.export(path)
+            print(f"Trace written to {path}")
 
-            pygame.display.flip()
-            self.clock.tick(60)
+    def wait_for_events(self):
+        # Sleep until an event arrives (or the idle timeout passes), then drain the queue
+        event = pygame.event.wait(self.idle_timeout)
+        events = [event] if event.type != pygame.NOEVENT else []
+        return events + pygame.event.get()
 
     def handle_mouse_click(self):
         # Handles mouse click events by translating click position to board coordinates and passing them to the game.
         mouse_x, mouse_y = pygame.mouse.get_pos()
         clicked_row = (mouse_y - 100) // self.game.state.board.tile_size
         clicked_col = mouse_x // self.game.state.board.tile_size
-        self.game.handle_click(clicked_row, clicked_col)
+        if 0 <= clicked_row < 8 and 0 <= clicked_col < 8:
+            self.game.handle_click(clicked_row, clicked_col)
 
 if __name__ == "__main__":
-    main = Main()
+    parser = argparse.ArgumentParser(description="Checkers")
+    parser.add_argument("--fps", type=int, default=60, help="frame cap while the board or AI is active")
+    parser.add_argument("--idle-fps", type=int, default=2,
+                        help="wake-ups per second while idle (0 sleeps until the next event)")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let the search AI think while the human is to move (keeps one core busy)")
+    parser.add_argument("--book", default=None, help="opening book file for the search AI (see OpeningBook.py)")
+    parser.add_argument("--weights", default=None,
+                        help="evaluation for the search AI: JSON weights or a network trained by Learning.py")
+    parser.add_argument("--profile", action="store_true", help="install the timing hooks and show the overlay")
+    parser.add_argument("--trace", default=None, help="save the profiling trace here on exit (.json or .csv)")
+    args = parser.parse_args()
+    main = Main(fps=args.fps, idle_fps=args.idle_fps, book=OpeningBook(args.book) if args.book else None,
+                weights=args.weights, ponder=args.ponder, profile=args.profile, trace=args.trace)
+    if args.profile:
+        main.profiler.overlay = True
     main.run()
@@ -0,0 +1,123 @@
+import numpy as np
+from Constants import WHITE
+
+# Learned evaluation: a small NumPy network trained on self-play results (see
+# Learning.py). The input is 128 bits, one per square for the side to move's
+# men, its kings, the opponent's men and the opponent's kings. When WHITE is to
+# move the board is turned half a circle first, so both sides look at it the
+# same way up. The output (tanh) is the expected result for the side to move,
+# -1 loss to +1 win; searches see it scaled to SCALE. A network with no hidden
+# layer is a linear evaluator.
+
+VERSION = 1
+INPUTS = 128
+SCALE = 1000  # Search score of a position the network calls a certain win; far below the mate scores
+
+
+def features(own, opp, kings, flip):
+    # (n, INPUTS) float32 network inputs for arrays of bitboards seen from the side to move.
+    # flip (a bool, or one per position) turns the board for WHITE to move.
+    own = np.asarray(own, dtype=np.uint32)
+    opp = np.asarray(opp, dtype=np.uint32)
+    kings = np.asarray(kings, dtype=np.uint32)
+    planes = np.stack([own & ~kings, own & kings, opp & ~kings, opp & kings], axis=1).astype("<u4")
+    bits = np.unpackbits(planes.view(np.uint8), axis=1, bitorder="little").reshape(len(planes), 4, 32)
+    if np.ndim(flip):
+        bits = np.where(np.asarray(flip)[:, None, None], bits[:, :, ::-1], bits)
+    elif flip:
+        bits = bits[:, :, ::-1]
+    return bits.reshape(len(planes), INPUTS).astype(np.float32)
+
+
+def position_features(black, white, kings, turn):
+    # Network inputs for positions with mixed sides to move; turn is 0 for BLACK and 1 for WHITE
+    white_to_move = np.asarray(turn) != 0
+    own = np.where(white_to_move, white, black)
+    opp = np.where(white_to_move, black, white)
+    return features(own, opp, kings, white_to_move)
+
+
+class Network:
+    def __init__(self, hidden=32, seed=0, params=None):
+        # INPUTS -> hidden ReLU units -> 1 tanh output; hidden=0 is a linear evaluator.
+        # params (from load) replaces the random initial weights.
+        if params is None:
+            rng = np.random.default_rng(seed)
+            params = {}
+            width = INPUTS
+            if hidden:
+                params["w1"] = rng.normal(0, np.sqrt(2 / INPUTS), (INPUTS, hidden)).astype(np.float32)
+                params["b1"] = np.zeros(hidden, dtype=np.float32)
+                width = hidden
+            params["w2"] = rng.normal(0, np.sqrt(1 / width), width).astype(np.float32) * 0.1
+            params["b2"] = np.zeros((), dtype=np.float32)
+        self.params = params
+        self.hidden = len(params["b1"]) if "w1" in params else 0
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if "version" not in data or int(data["version"]) != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} evaluation network")
+            params = {name: data[name].astype(np.float32) for name in ("w1", "b1", "w2", "b2") if name in data}
+        if params["w2"].shape[0] != (len(params["b1"]) if "w1" in params else INPUTS):
+            raise ValueError(f"{path}: layer sizes do not match")
+        return cls(params=params)
+
+    def save(self, path):
+        # np.savez adds ".npz" to paths without it
+        np.savez(path, version=np.int32(VERSION), **self.params)
+
+    def forward(self, x):
+        # Expected results in [-1, 1] for a batch of inputs
+        params = self.params
+        if self.hidden:
+            x = np.maximum(x @ params["w1"] + params["b1"], 0)
+        return np.tanh(x @ params["w2"] + params["b2"])
+
+    def gradients(self, x, target):
+        # Mean squared error against the targets and its gradient for every parameter
+        params = self.params
+        hidden = x
+        if self.hidden:
+            hidden = np.maximum(x @ params["w1"] + params["b1"], 0)
+        output = np.tanh(hidden @ params["w2"] + params["b2"])
+        error = output - target
+        delta = 2 * error * (1 - output * output) / len(x)
+        grads = {"w2": hidden.T @ delta, "b2": delta.sum()}
+        if self.hidden:
+            delta_hidden = np.outer(delta, params["w2"]) * (hidden > 0)
+            grads["w1"] = x.T @ delta_hidden
+            grads["b1"] = delta_hidden.sum(axis=0)
+        return float(np.mean(error * error)), grads
+
+
+class LearnedEvaluator:
+    # Drop-in for Evaluation.Evaluator. The network has no running piece-square table,
+    # so the incremental parts are zero and every score comes from evaluate/evaluate_batch.
+    batched = True  # AlphaBetaPlayer scores all children of a frontier node in one evaluate_batch call
+
+    def __init__(self, network):
+        self.network = network
+
+    @classmethod
+    def load(cls, path):
+        return cls(Network.load(path))
+
+    def piece_value(self, color, king, square):
+        return 0
+
+    def score_position(self, black, white, kings):
+        return 0
+
+    def move_delta(self, move, color, kings, new_kings):
+        return 0
+
+    def evaluate(self, own, opp, kings, color, score):
+        # Leaf evaluation from the side to move's point of view (score, the table total, is unused)
+        return self.evaluate_batch((own,), (opp,), (kings,), color)[0]
+
+    def evaluate_batch(self, own, opp, kings, color):
+        # Scores of many positions with the same side to move: one matrix multiply per layer
+        values = self.network.forward(features(own, opp, kings, color == WHITE))
+        return (values * SCALE).astype(np.int64).tolist()
@@ -0,0 +1,171 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from AI_Player import AIPlayer
+from AlphaBeta_Player import AlphaBetaPlayer
+from Rules import GameState
+from Zobrist import side_key
+from Constants import BLACK, WHITE
+
+# Opening book: one fixed-size record per (position, move), sorted by the
+# position's Zobrist key (side to move included) so a lookup is a binary search
+# over the memory-mapped file. Win statistics are from the mover's point of view.
+
+MAGIC = b"CKOB"
+VERSION = 3  # 2: compulsory captures and whole capture sequences; 3: captured squares stored with each move
+HEADER = struct.Struct("<4sBxxxI")  # magic, version, record count
+# The captured mask tells apart capture sequences that share their origin and target squares
+RECORD = struct.Struct("<QBBIHHHH")  # key, origin, target, captured, weight, wins, draws, losses
+_KEY = struct.Struct("<Q")
+MAX_COUNT = 0xFFFF
+
+
+def move_weight(wins, draws, losses):
+    # Smoothed score percentage (1-99): strong moves are picked more often, but no move is ruled out
+    return max(1, round(100 * (wins + 0.5 * draws + 1) / (wins + draws + losses + 2)))
+
+
+class OpeningBook:
+    def __init__(self, path):
+        # Memory-map a book file written by write_book
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.hits = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getstate__(self):
+        # Pickled books (players sent to worker processes) reopen the file on arrival
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def _key_at(self, index):
+        return _KEY.unpack_from(self.data, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, key):
+        # All (origin, target, captured, weight, wins, draws, losses) entries stored for a position key
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.count and self._key_at(low) == key:
+            entries.append(RECORD.unpack_from(self.data, HEADER.size + low * RECORD.size)[1:])
+            low += 1
+        return entries
+
+    def choose_move(self, bitboard, color):
+        # Weighted random pick among the book moves that are legal here, or None when out of book
+        entries = self.lookup(bitboard.hash ^ side_key(color))
+        if not entries:
+            return None
+        legal = set(bitboard.get_legal(color))
+        candidates = [(entry[:3], entry[3]) for entry in entries if entry[:3] in legal]
+        if not candidates:
+            return None
+        self.hits += 1
+        moves, weights = zip(*candidates)
+        return random.choices(moves, weights=weights)[0]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def write_book(stats, path, min_games=1):
+    # stats maps (key, origin, target, captured) to [wins, draws, losses]; entries seen fewer than min_games
+    # times are dropped
+    records = sorted((key, move, results) for (key, *move), results in stats.items() if sum(results) >= min_games)
+    with open(path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for key, (origin, target, captured), (wins, draws, losses) in records:
+            out.write(RECORD.pack(key, origin, target, captured, move_weight(wins, draws, losses),
+                                  min(wins, MAX_COUNT), min(draws, MAX_COUNT), min(losses, MAX_COUNT)))
+    return len(records)
+
+
+def self_play_game(index, book_plies, random_plies, time_limit, max_moves, seed):
+    # Play one search-vs-search game after a few random plies for variety.
+    # Returns the (key, origin, target, captured, mover) of the first book_plies moves and the winner (0 for a draw).
+    random.seed(seed + index)
+    engines = {color: AlphaBetaPlayer(color, time_limit=time_limit) for color in (BLACK, WHITE)}
+    opener = AIPlayer(BLACK)
+    state = GameState()
+    line = []
+    winner = state.is_game_over()
+    while winner is None and len(state.undo_stack) < max_moves:
+        color = state.current_turn
+        bitboard = state.board.bitboard
+        if len(state.undo_stack) < random_plies:
+            move = opener.choose_move(bitboard, color)
+        else:
+            move = engines[color].choose_move(bitboard, color)
+        if move is None:
+            break
+        if len(state.undo_stack) < book_plies:
+            line.append((state.zobrist_key, *move, color))
+        played = len(state.undo_stack)
+        engines[color].play_move(state, move)
+        if len(state.undo_stack) == played:
+            break
+        winner = state.is_game_over()
+    return line, winner if winner in (BLACK, WHITE) else 0
+
+
+def build_book(games, book_plies=16, random_plies=4, time_limit=0.05, max_moves=200, seed=0, workers=None,
+               progress=print):
+    # Collect per-move win statistics from self-play games spread over a process pool
+    stats = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(self_play_game, index, book_plies, random_plies, time_limit, max_moves, seed)
+                   for index in range(games)]
+        for finished, future in enumerate(as_completed(futures), 1):
+            line, winner = future.result()
+            for key, origin, target, captured, mover in line:
+                results = stats.setdefault((key, origin, target, captured), [0, 0, 0])
+                if winner == 0:
+                    results[1] += 1
+                elif winner == mover:
+                    results[0] += 1
+                else:
+                    results[2] += 1
+            if finished % 10 == 0 or finished == games:
+                progress(f"{finished}/{games} games, {len(stats)} book moves, {time.perf_counter() - start:.1f}s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a checkers opening book from self-play.")
+    parser.add_argument("-n", "--games", type=int, default=200, help="number of self-play games")
+    parser.add_argument("-o", "--output", default="opening.book", help="book file")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--plies", type=int, default=16, help="how many plies of each game go into the book")
+    parser.add_argument("--random-plies", type=int, default=4, help="random opening plies for variety")
+    parser.add_argument("--time-limit", type=float, default=0.05, help="search seconds per move")
+    parser.add_argument("--min-games", type=int, default=2, help="drop moves played in fewer games")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    args = parser.parse_args()
+
+    stats = build_book(args.games, args.plies, args.random_plies, args.time_limit, seed=args.seed,
+                       workers=args.workers)
+    count = write_book(stats, args.output, args.min_games)
+    print(f"wrote {count} book moves to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import argparse
+import json
+import re
+import sys
+import time
+from Bitboard import coords_to_square, square_to_coords, jump_path, popcount
+from Player import Pawn, King
+from Rules import GameState
+from Constants import BLACK, WHITE
+
+# Portable Draughts Notation. Squares are numbered 1-32 from BLACK's side, so
+# BLACK (who moves first) starts on 1-12 as in standard PDN: number = 32 - bitboard square.
+# Moves are written "11-15", captures "15x22" with every landing square of a capture sequence
+# ("15x22x29"). Results are from BLACK's side: "1-0" is a BLACK win.
+
+_TAG = re.compile(r'\[\s*(\w+)\s+"([^"]*)"\s*\]')
+_TOKEN = re.compile(r'(1/2-1/2|[012]-[012](?!\d)|\*)|(\d+)\.(?:\.\.)?|(\d+(?:[-x]\d+)+)')
+_MOVE = re.compile(r'\d+(?:[-x]\d+)+')
+
+
+class PDNError(ValueError):
+    # A game record that cannot be parsed or replayed under the current rules
+    pass
+
+
+def square_number(row, col):
+    return 32 - coords_to_square(row, col)
+
+
+def square_coords(number):
+    if not 1 <= number <= 32:
+        raise PDNError(f"no such square: {number}")
+    return square_to_coords(32 - number)
+
+
+def result_text(winner):
+    # PDN result token for a GameState.is_game_over value (None while the game is running)
+    if winner is None:
+        return "*"
+    if winner == 0:
+        return "1/2-1/2"
+    return "1-0" if winner == BLACK else "0-1"
+
+
+def move_text(move):
+    # PDN text of a bitboard (from, to, captured) move, with every square it visits
+    separator = "x" if move[2] else "-"
+    return separator.join(str(32 - square) for square in jump_path(move))
+
+
+def legal_move(state, squares, capture):
+    # The legal move (of the side to move in state) that a PDN move's square numbers describe.
+    # A capture sequence may be given by every landing square or just its first and last.
+    # Raises PDNError when there is no such move.
+    text = ("x" if capture else "-").join(str(square) for square in squares)
+    from_row, from_col = square_coords(squares[0])
+    for square in squares[1:]:
+        square_coords(square)
+    piece = state.board.tiles[from_row][from_col].piece
+    if piece is None or piece.color != state.current_turn:
+        raise PDNError(f"{text}: no piece of the side to move on {squares[0]}")
+    candidates = [move for move in state.legal_moves()
+                  if (32 - move[0], 32 - move[1]) == (squares[0], squares[-1])
+                  and (len(squares) == 2 or tuple(32 - square for square in jump_path(move)) == squares)]
+    if not candidates:
+        raise PDNError(f"{text}: illegal move")
+    move = max(candidates, key=lambda candidate: popcount(candidate[2]))
+    if bool(move[2]) != capture:
+        raise PDNError(f"{text}: capture marker does not match the move")
+    return move
+
+
+def parse_move(state, text):
+    # A move typed as PDN text ("11-15", "15x22x29") in the current position; raises PDNError
+    text = text.strip()
+    if not _MOVE.fullmatch(text):
+        raise PDNError(f"not a move: {text!r}")
+    return legal_move(state, tuple(int(square) for square in re.split("[-x]", text)), "x" in text)
+
+
+def fen(game_state):
+    # PDN FEN of the position: side to move, then each side's squares (K marks kings)
+    sides = {BLACK: [], WHITE: []}
+    for row in game_state.board.tiles:
+        for tile in row:
+            piece = tile.piece
+            if piece:
+                sides[piece.color].append((square_number(tile.row, tile.col), piece.king))
+    fields = []
+    for letter, color in (("W", WHITE), ("B", BLACK)):
+        squares = sorted(sides[color])
+        fields.append(letter + ",".join(("K" if king else "") + str(number) for number, king in squares))
+    return ("B" if game_state.current_turn == BLACK else "W") + ":" + ":".join(fields)
+
+
+def setup_fen(game_state, text):
+    # Replace the board contents with a PDN FEN position
+    try:
+        turn, *fields = text.strip().rstrip(".").split(":")
+        board = game_state.board
+        for row in board.tiles:
+            for tile in row:
+                tile.set_piece(None)
+        for field in fields:
+            color = {"W": WHITE, "B": BLACK}[field[0].upper()]
+            for item in filter(None, field[1:].split(",")):
+                king = item.startswith("K")
+                row, col = square_coords(int(item.lstrip("K")))
+                piece = King(row, col, color) if king else Pawn(row, col, color)
+                board.tiles[row][col].set_piece(piece)
+        game_state.current_turn = {"W": WHITE, "B": BLACK}[turn.upper()]
+    except (KeyError, IndexError, ValueError) as error:
+        raise PDNError(f"bad FEN {text!r}: {error}")
+
+
+class PDNRecorder:
+    def __init__(self, event="Checkers", black="?", white="?"):
+        # Collects the moves of one game as they are played; GameState.play_move feeds it
+        self.tags = {"Event": event, "Date": time.strftime("%Y.%m.%d"), "Black": black, "White": white}
+        self.moves = []
+
+    def record(self, move):
+        self.moves.append(move_text(move))
+
+    def take_back(self):
+        if self.moves:
+            self.moves.pop()
+
+    def pdn(self, result="*"):
+        # The game as PDN text, tags first, ten moves per line
+        tags = dict(self.tags, Result=result)
+        lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+        lines.append("")
+        words = []
+        for index, move in enumerate(self.moves):
+            if index % 2 == 0:
+                words.append(f"{index // 2 + 1}.")
+            words.append(move)
+        words.append(result)
+        for start in range(0, len(words), 30):
+            lines.append(" ".join(words[start:start + 30]))
+        return "\n".join(lines) + "\n\n"
+
+    def save(self, path, result="*"):
+        # Append the game to a PDN collection
+        with open(path, "a") as out:
+            out.write(self.pdn(result))
+
+
+def read_games(stream):
+    # Stream games out of a PDN collection one at a time, so files of any size can be read.
+    # Yields {"tags": {...}, "moves": [(squares, capture), ...], "result": text}.
+    tags, moves, in_comment = {}, [], False
+    for line in stream:
+        # Comments ({...}, possibly over several lines) and ; line comments are skipped
+        text = []
+        for char in line:
+            if in_comment:
+                in_comment = char != "}"
+            elif char == "{":
+                in_comment = True
+            elif char == ";":
+                break
+            else:
+                text.append(char)
+        line = "".join(text).strip()
+        if not line:
+            continue
+
+        if line.startswith("["):
+            if moves:
+                # A new tag section without a result token closes the previous game
+                yield {"tags": tags, "moves": moves, "result": tags.get("Result", "*")}
+                tags, moves = {}, []
+            for name, value in _TAG.findall(line):
+                tags[name] = value
+            continue
+
+        for result, number, move in _TOKEN.findall(line):
+            if move:
+                squares = tuple(int(square) for square in re.split("[-x]", move))
+                moves.append((squares, "x" in move))
+            elif result:
+                yield {"tags": tags, "moves": moves, "result": result}
+                tags, moves = {}, []
+    if moves or tags:
+        yield {"tags": tags, "moves": moves, "result": tags.get("Result", "*")}
+
+
+def replay(game):
+    # Play a parsed game through GameState, checking every move against the rules.
+    # Yields (ply, fen before the move, move text) per position; raises PDNError on an illegal move.
+    state = GameState()
+    if "FEN" in game["tags"]:
+        setup_fen(state, game["tags"]["FEN"])
+    for ply, (squares, capture) in enumerate(game["moves"]):
+        text = ("x" if capture else "-").join(str(square) for square in squares)
+        try:
+            move = legal_move(state, squares, capture)
+        except PDNError as error:
+            raise PDNError(f"ply {ply + 1}: {error}")
+        position = fen(state)
+        state.play_move(move)
+        yield ply, position, text
+    # The final position, after the last move
+    yield len(game["moves"]), fen(state), None
+
+
+def bulk_replay(paths, out):
+    # Validate every game in the given PDN files and write one JSON line per position.
+    # Returns (games, valid games, positions).
+    games = valid = positions = 0
+    for path in paths:
+        with open(path) as stream:
+            for game in read_games(stream):
+                games += 1
+                records = []
+                try:
+                    for ply, position, move in replay(game):
+                        records.append({"game": games, "ply": ply, "fen": position, "move": move,
+                                        "result": game["result"]})
+                except PDNError as error:
+                    print(f"{path}: game {games}: {error}", file=sys.stderr)
+                    continue
+                valid += 1
+                positions += len(records)
+                if out is not None:
+                    for record in records:
+                        out.write(json.dumps(record) + "\n")
+    return games, valid, positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate PDN game collections and dump their positions.")
+    parser.add_argument("files", nargs="+", help="PDN files")
+    parser.add_argument("-o", "--output", default=None, help="JSON-lines file for the per-position records")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out = open(args.output, "w") if args.output else None
+    try:
+        games, valid, positions = bulk_replay(args.files, out)
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {valid} valid, {games - valid} rejected, {positions} positions in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
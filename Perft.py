@@ -0,0 +1,121 @@
+import argparse
+import json
+import time
+from Bitboard import generate_legal, apply_move
+from PDN import setup_fen, fen
+from Rules import GameState
+from Constants import BLACK, WHITE
+
+# Perft: count the leaf nodes of the full move tree to a fixed depth. The counts
+# pin down the move generator (any rules change shows up as a different number)
+# and the time taken measures make/unmake speed.
+
+# Test positions in PDN FEN, besides the start position
+POSITIONS = {
+    "start": None,
+    "kings": "B:WK5,K14,23,27:BK18,K30,10,12",
+    "captures": "W:W14,15,22,23,26:B6,10,11,18,19",
+    "promotion": "B:W29,30,K11:B6,25,26,K19",
+    "endgame": "W:WK1,K32:BK10,K23",
+}
+
+
+def perft(state, depth):
+    # Leaf count using Pawn/King move generation and GameState.make_move / unmake_move
+    if depth == 0:
+        return 1
+    if state.is_game_over() is not None:
+        return 0
+    moves = state.board.get_all_moves(state.current_turn)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        state.make_move(move)
+        nodes += perft(state, depth - 1)
+        state.unmake_move()
+    return nodes
+
+
+def perft_bitboard(black, white, kings, color, depth):
+    # The same count on plain bitboard integers, as a cross-check of the two move generators
+    if depth == 0:
+        return 1
+    own, opp = (black, white) if color == BLACK else (white, black)
+    other = WHITE if color == BLACK else BLACK
+    moves = generate_legal(own, opp, kings, color)
+    # Game over as in GameState.is_game_over: the side to move has no legal move
+    if not moves:
+        return 0
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        new_own, new_opp, new_kings = apply_move(own, opp, kings, move, color)
+        if color == BLACK:
+            nodes += perft_bitboard(new_own, new_opp, new_kings, other, depth - 1)
+        else:
+            nodes += perft_bitboard(new_opp, new_own, new_kings, other, depth - 1)
+    return nodes
+
+
+def position_state(position):
+    # A headless GameState set up from a PDN FEN (None for the start position)
+    state = GameState()
+    if position is not None:
+        setup_fen(state, position)
+    return state
+
+
+def run_perft(depth, positions=POSITIONS, check=False, progress=print):
+    # Perft every position from depth 1 to depth; returns one result dict per (position, depth)
+    results = []
+    for name, position in positions.items():
+        state = position_state(position)
+        for current in range(1, depth + 1):
+            start = time.perf_counter()
+            nodes = perft(state, current)
+            elapsed = time.perf_counter() - start
+            result = {
+                "position": name,
+                "fen": fen(state),
+                "depth": current,
+                "nodes": nodes,
+                "seconds": round(elapsed, 4),
+                "nps": int(nodes / elapsed) if elapsed > 0 else 0,
+            }
+            if check:
+                bitboard = state.board.bitboard
+                result["bitboard_nodes"] = perft_bitboard(bitboard.black, bitboard.white, bitboard.kings,
+                                                          state.current_turn, current)
+                result["match"] = result["bitboard_nodes"] == nodes
+            results.append(result)
+            line = f"{name:10} depth {current}: {nodes} nodes in {elapsed:.3f}s ({result['nps']} nodes/s)"
+            if check and not result["match"]:
+                line += f"  MISMATCH: bitboard counts {result['bitboard_nodes']}"
+            progress(line)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count move-tree leaf nodes from the start and test positions.")
+    parser.add_argument("-d", "--depth", type=int, default=5, help="deepest perft depth")
+    parser.add_argument("-p", "--position", action="append", default=None,
+                        help="only these positions (%s) or PDN FEN strings" % ", ".join(POSITIONS))
+    parser.add_argument("--check", action="store_true", help="cross-check every count with the bitboard generator")
+    parser.add_argument("-o", "--output", default=None, help="save the results as JSON")
+    args = parser.parse_args()
+
+    positions = POSITIONS
+    if args.position:
+        positions = {name: POSITIONS.get(name, name) for name in args.position}
+    results = run_perft(args.depth, positions, args.check)
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({"perft": results}, out, indent=2)
+    if args.check and not all(result["match"] for result in results):
+        raise SystemExit("perft mismatch between the tile and bitboard move generators")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,54 @@
-import pygame
-from Constants import BLACK, WHITE
+from Constants import BLACK, WHITE, END_ROW_BLACK, END_ROW_WHITE
+
+# pygame is only imported when a piece is drawn, so the rules engine stays headless
+
+# Piece surfaces are built once per look and reused for every draw
+_sprite_cache = {}
+
+OPPONENT = {BLACK: WHITE, WHITE: BLACK}
+FORWARD_ROW = {WHITE: 1, BLACK: -1}  # WHITE moves down the board, BLACK moves up
+PROMOTION_ROW = {BLACK: END_ROW_BLACK, WHITE: END_ROW_WHITE}
+DIAGONALS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _build_tables():
+    # Per-square lookup tables, indexed [row][col], built once at import so move
+    # generation is table lookups instead of offset arithmetic and bounds checks
+    rays = [[None] * 8 for _ in range(8)]
+    jumps = [[None] * 8 for _ in range(8)]
+    pawn_steps = {BLACK: [[None] * 8 for _ in range(8)], WHITE: [[None] * 8 for _ in range(8)]}
+    pawn_jumps = {BLACK: [[None] * 8 for _ in range(8)], WHITE: [[None] * 8 for _ in range(8)]}
+    for row in range(8):
+        for col in range(8):
+            square_rays, square_jumps = [], []
+            for row_offset, col_offset in DIAGONALS:
+                # Every square along the diagonal, nearest first
+                ray = []
+                new_row, new_col = row + row_offset, col + col_offset
+                while _on_board(new_row, new_col):
+                    ray.append((new_row, new_col))
+                    new_row, new_col = new_row + row_offset, new_col + col_offset
+                square_rays.append(tuple(ray))
+                # (landing square, jumped square) for a short jump in this direction
+                jump = (ray[1], ray[0]) if len(ray) >= 2 else None
+                square_jumps.append(jump)
+            rays[row][col] = tuple(ray for ray in square_rays if ray)
+            jumps[row][col] = tuple(jump for jump in square_jumps if jump)
+            for color in (BLACK, WHITE):
+                forward = [index for index, (row_offset, _) in enumerate(DIAGONALS) if row_offset == FORWARD_ROW[color]]
+                pawn_steps[color][row][col] = tuple(square_rays[index][0] for index in forward if square_rays[index])
+                pawn_jumps[color][row][col] = tuple(square_jumps[index] for index in forward if square_jumps[index])
+    return rays, jumps, pawn_steps, pawn_jumps
+
+
+# RAYS: diagonal rays from a square; JUMPS: (landing, jumped) pairs in all four
+# directions; PAWN_STEPS / PAWN_JUMPS: the same restricted to a colour's forward directions
+RAYS, JUMPS, PAWN_STEPS, PAWN_JUMPS = _build_tables()
+
 
 class Piece:
     def __init__(self, row, col, color):
@@ -10,20 +59,33 @@ class Piece:
         self.selected = False
         self.tile = None
 
-    def make_king(self):
-        self.king = True
-
-    def draw(self, screen, x, y):
-        radius = 40
-        king_radius = 20
+    def draw(self, screen, x, y, tile_size=100):
+        # Blit the cached sprite centred on (x, y)
+        screen.blit(self.get_sprite(tile_size), (x - tile_size // 2, y - tile_size // 2))
+
+    def get_sprite(self, tile_size):
+        # Look up (or build once) the surface for this piece's colour, king and selection state
+        key = (type(self), self.color, self.king, self.selected, tile_size)
+        sprite = _sprite_cache.get(key)
+        if sprite is None:
+            import pygame
+            sprite = pygame.Surface((tile_size, tile_size), pygame.SRCALPHA)
+            self.render_sprite(sprite, (tile_size // 2, tile_size // 2), tile_size)
+            _sprite_cache[key] = sprite
+        return sprite
+
+    def render_sprite(self, surface, center, tile_size):
+        import pygame
+        radius = tile_size * 2 // 5
+        king_radius = tile_size // 5
 
         if self.king:
-            pygame.draw.circle(screen, (255, 255, 255), (x, y), king_radius)
+            pygame.draw.circle(surface, (255, 255, 255), center, king_radius)
         else:
             if self.selected:
                 # Draw a yellow border around the selected piece
-                pygame.draw.circle(screen, (255, 255, 0), (x, y), radius + 5)
-            pygame.draw.circle(screen, self.color, (x, y), radius)
+                pygame.draw.circle(surface, (255, 255, 0), center, radius + tile_size // 20)
+            pygame.draw.circle(surface, self.color, center, radius)
 
     def is_valid_move(self, new_row, new_col, tiles):
         raise NotImplementedError("Subclasses must implement is_valid_move")
@@ -34,123 +96,119 @@ class Piece:
     def get_possible_captures(self, tiles):
         raise NotImplementedError("Subclasses must implement get_possible_captures")
 
+    def get_jumps(self, row, col):
+        # (landing, jumped) squares this piece could jump from (row, col)
+        raise NotImplementedError("Subclasses must implement get_jumps")
+
+    def get_capture_sequences(self, tiles):
+        # Complete capture sequences as (final row, final col, captured pieces): the piece keeps
+        # jumping while it can, and a man that reaches the far row is crowned, which ends the move
+        sequences = []
+        self.extend_captures(self.row, self.col, [], tiles, sequences)
+        return sequences
+
+    def extend_captures(self, row, col, captured, tiles, sequences):
+        # Captured pieces stay on their tiles until the move is over, so they can be neither
+        # jumped twice nor landed on; the piece's own start tile counts as empty
+        extended = False
+        opponent_color = OPPONENT[self.color]
+        for (new_row, new_col), (mid_row, mid_col) in self.get_jumps(row, col):
+            jumped = tiles[mid_row][mid_col].piece
+            landing = tiles[new_row][new_col].piece
+            if jumped is None or jumped.color != opponent_color or jumped in captured:
+                continue
+            if landing is not None and landing is not self:
+                continue
+            extended = True
+            if not self.king and new_row == PROMOTION_ROW[self.color]:
+                sequences.append((new_row, new_col, captured + [jumped]))
+            else:
+                self.extend_captures(new_row, new_col, captured + [jumped], tiles, sequences)
+        if not extended and captured:
+            sequences.append((row, col, captured))
+
 
 class Pawn(Piece):
-    def draw(self, screen, x, y):
-        pygame.draw.circle(screen, self.color, (x, y), 40)
+    def render_sprite(self, surface, center, tile_size):
+        import pygame
+        pygame.draw.circle(surface, self.color, center, tile_size * 2 // 5)
 
     def is_valid_move(self, new_row, new_col, tiles):
-        # Determine the direction of movement based on the piece color
-        direction = 1 if self.color == WHITE else -1  # WHITE moves up, BLACK moves down
+        target = (new_row, new_col)
 
-        # Check for a regular move (one step diagonally)
-        if (new_row - self.row) == direction and abs(new_col - self.col) == 1:
+        # Check for a regular move (one step diagonally forward)
+        if target in PAWN_STEPS[self.color][self.row][self.col]:
             return tiles[new_row][new_col].piece is None
 
-        # Check for a capture move (two steps diagonally)
-        elif (new_row - self.row) == 2 * direction and abs(new_col - self.col) == 2:
-            mid_row = (self.row + new_row) // 2
-            mid_col = (self.col + new_col) // 2
-            opponent_color = WHITE if self.color == BLACK else BLACK
-            return (
-                0 <= mid_row < 8
-                and 0 <= mid_col < 8
-                and tiles[mid_row][mid_col].piece
-                and tiles[mid_row][mid_col].piece.color == opponent_color
-            )
+        # Check for a capture move (two steps diagonally forward)
+        for landing, (mid_row, mid_col) in PAWN_JUMPS[self.color][self.row][self.col]:
+            if landing == target:
+                jumped = tiles[mid_row][mid_col].piece
+                return tiles[new_row][new_col].piece is None and jumped is not None and jumped.color == OPPONENT[self.color]
         return False
 
     def get_possible_moves(self, tiles):
-        direction = 1 if self.color == WHITE else -1
-        moves = []
-
         # Check for possible regular moves
-        if 0 <= self.row + direction < 8:
-            for col_offset in [-1, 1]:
-                new_col = self.col + col_offset
-                if 0 <= new_col < 8:
-                    if tiles[self.row + direction][new_col].piece is None:
-                        moves.append((self.row + direction, new_col))
-        
-        return moves
+        return [(row, col) for row, col in PAWN_STEPS[self.color][self.row][self.col] if tiles[row][col].piece is None]
 
     def get_possible_captures(self, tiles):
-        direction = 1 if self.color == WHITE else -1
-        captures = []
-
         # Check for possible capture moves
-        if 0 <= self.row + 2 * direction < 8:
-            for col_offset in [-2, 2]:
-                new_col = self.col + col_offset
-                if 0 <= new_col < 8:
-                    mid_row = (self.row + self.row + 2 * direction) // 2
-                    mid_col = (self.col + new_col) // 2
-                    opponent_color = WHITE if self.color == BLACK else BLACK
-                    if (
-                        tiles[self.row + 2 * direction][new_col].piece is None
-                        and tiles[mid_row][mid_col].piece
-                        and tiles[mid_row][mid_col].piece.color == opponent_color
-                    ):
-                        captures.append((self.row + 2 * direction, new_col))
-        
+        captures = []
+        opponent_color = OPPONENT[self.color]
+        for (row, col), (mid_row, mid_col) in PAWN_JUMPS[self.color][self.row][self.col]:
+            jumped = tiles[mid_row][mid_col].piece
+            if tiles[row][col].piece is None and jumped is not None and jumped.color == opponent_color:
+                captures.append((row, col))
         return captures
 
+    def get_jumps(self, row, col):
+        return PAWN_JUMPS[self.color][row][col]
 
-class King(Piece):
-    def draw(self, screen, x, y):
-        pygame.draw.circle(screen, self.color, (x, y), 40)
-        pygame.draw.circle(screen, WHITE, (x, y), 20)
-
-    def is_valid_move(self, new_row, new_col, tiles):
-        # Check if the move is diagonal
-        if abs(new_row - self.row) == abs(new_col - self.col):
-            row_direction = 1 if new_row > self.row else -1
-            col_direction = 1 if new_col > self.col else -1
 
-            current_row, current_col = self.row, self.col
-            # Check if the path is clear
-            while current_row != new_row and current_col != new_col:
-                current_row += row_direction
-                current_col += col_direction
-
-                if 0 <= current_row < 8 and 0 <= current_col < 8:
-                    if tiles[current_row][current_col].piece is not None:
-                        return False
+class King(Piece):
+    def __init__(self, row, col, color):
+        super().__init__(row, col, color)
+        self.king = True
 
-            return tiles[new_row][new_col].piece is None
+    def render_sprite(self, surface, center, tile_size):
+        import pygame
+        pygame.draw.circle(surface, self.color, center, tile_size * 2 // 5)
+        pygame.draw.circle(surface, WHITE, center, tile_size // 5)
 
+    def is_valid_move(self, new_row, new_col, tiles):
+        # Captures jump an adjacent opponent piece in any direction
+        if (new_row, new_col) in self.get_possible_captures(tiles):
+            return True
+
+        # Otherwise the target has to be on a diagonal ray with a clear path up to and including it
+        target = (new_row, new_col)
+        for ray in RAYS[self.row][self.col]:
+            for row, col in ray:
+                if tiles[row][col].piece is not None:
+                    break
+                if (row, col) == target:
+                    return True
         return False
 
     def get_possible_moves(self, tiles):
         moves = []
-        # Check all diagonal directions
-        for row_offset in [-1, 1]:
-            for col_offset in [-1, 1]:
-                new_row, new_col = self.row + row_offset, self.col + col_offset
-                while 0 <= new_row < 8 and 0 <= new_col < 8:
-                    if tiles[new_row][new_col].piece is None:
-                        moves.append((new_row, new_col))
-                    else:
-                        break
-                    new_row += row_offset
-                    new_col += col_offset
+        # Walk each diagonal ray until it is blocked
+        for ray in RAYS[self.row][self.col]:
+            for row, col in ray:
+                if tiles[row][col].piece is not None:
+                    break
+                moves.append((row, col))
         return moves
 
     def get_possible_captures(self, tiles):
         captures = []
-        # Check all diagonal directions for possible captures
-        for row_offset in [-1, 1]:
-            for col_offset in [-1, 1]:
-                new_row, new_col = self.row + 2 * row_offset, self.col + 2 * col_offset
-                while 0 <= new_row < 8 and 0 <= new_col < 8:
-                    mid_row, mid_col = (self.row + new_row) // 2, (self.col + new_col) // 2
-                    opponent_color = WHITE if self.color == BLACK else BLACK
-                    if (
-                        tiles[new_row][new_col].piece is None
-                        and tiles[mid_row][mid_col].piece
-                        and tiles[mid_row][mid_col].piece.color == opponent_color
-                    ):
-                        captures.append((new_row, new_col))
-                    new_row += 2 * row_offset
-                    new_col += 2 * col_offset
+        # Check all diagonal directions for an adjacent opponent piece to jump
+        opponent_color = OPPONENT[self.color]
+        for (row, col), (mid_row, mid_col) in JUMPS[self.row][self.col]:
+            jumped = tiles[mid_row][mid_col].piece
+            if tiles[row][col].piece is None and jumped is not None and jumped.color == opponent_color:
+                captures.append((row, col))
         return captures
+
+    def get_jumps(self, row, col):
+        return JUMPS[row][col]
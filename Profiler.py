@@ -0,0 +1,192 @@
+import cProfile
+import csv
+import functools
+import importlib
+import json
+import time
+from collections import Counter, deque
+
+# Hot-path instrumentation. Nothing is wrapped until install() is called, so the
+# game pays nothing when profiling is off; once installed each hook costs two
+# perf_counter calls (timed methods) or one counter increment (counted methods).
+
+# (module, class, method) timed on every call
+TIMED = [
+    ("Visualiser", "Board", "draw"),
+    ("Rules", "GameState", "handle_click"),
+    ("Rules", "GameState", "legal_moves"),
+    ("Rules", "GameState", "is_game_over"),
+    ("AI_Player", "AIPlayer", "make_move"),  # Subclasses that override make_move are wrapped too
+    ("AI_Worker", "AIWorker", "run_search"),  # The GUI's AI searches and ponders, on the worker thread
+    ("AI_Worker", "AIWorker", "run_ponder"),
+]
+
+# (module, class, method) only counted: move generation is called too often to time each call.
+# A class of None counts a module-level function under the name that module calls it by, which is
+# how the searches reach the bitboard generators (imported with "from Bitboard import ...").
+COUNTED = [
+    ("Rules", "Board", "get_all_moves"),
+    ("Player", "Pawn", "get_possible_moves"),
+    ("Player", "King", "get_possible_moves"),
+    ("Player", "Piece", "get_capture_sequences"),
+    ("Bitboard", "Bitboard", "get_legal"),
+    ("AlphaBeta_Player", None, "generate_legal"),
+    ("AlphaBeta_Player", None, "generate_captures"),
+    ("AlphaBeta_Player", None, "generate_moves"),
+    ("MCTS_Player", None, "generate_legal"),
+]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Profiler:
+    def __init__(self, frame_window=240, max_events=1000000):
+        # frame_window is how many recent frames the overlay statistics cover;
+        # max_events caps the session trace (oldest events are dropped first)
+        self.events = deque(maxlen=max_events)  # (label, start, seconds)
+        self.counts = Counter()
+        self.frame_times = deque(maxlen=frame_window)
+        self.last_frame = None
+        self.installed = []  # (class, method name, original attribute) to restore
+        self.overlay = False
+        self.cprofile = None
+        self.session_start = time.perf_counter()
+
+    def install(self):
+        # Wrap the hot paths listed in TIMED and COUNTED
+        if self.installed:
+            return
+        for module_name, class_name, method in TIMED:
+            base = getattr(importlib.import_module(module_name), class_name)
+            label = f"{class_name}.{method}"
+            for cls in [base] + self.subclasses(base):
+                if method in cls.__dict__:
+                    self.wrap(cls, method, self.timed(label, cls.__dict__[method]))
+        for label, owner, method in self.counted_hooks():
+            self.wrap(owner, method, self.counted(label, owner.__dict__[method]))
+
+    def counted_hooks(self):
+        # (label, class or module, name) of every COUNTED entry
+        hooks = []
+        for module_name, class_name, method in COUNTED:
+            module = importlib.import_module(module_name)
+            if class_name is None:
+                hooks.append((f"{module_name}.{method}", module, method))
+            else:
+                hooks.append((f"{class_name}.{method}", getattr(module, class_name), method))
+        return hooks
+
+    def uninstall(self):
+        for cls, method, original in reversed(self.installed):
+            setattr(cls, method, original)
+        self.installed = []
+
+    def subclasses(self, cls):
+        found = []
+        for subclass in cls.__subclasses__():
+            found.append(subclass)
+            found.extend(self.subclasses(subclass))
+        return found
+
+    def wrap(self, cls, method, wrapper):
+        self.installed.append((cls, method, cls.__dict__[method]))
+        setattr(cls, method, wrapper)
+
+    def timed(self, label, function):
+        events = self.events
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                events.append((label, start, time.perf_counter() - start))
+        return wrapper
+
+    def counted(self, label, function):
+        counts = self.counts
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            counts[label] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    def frame(self):
+        # Call once per main-loop iteration to record the frame time
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+            self.events.append(("frame", self.last_frame, now - self.last_frame))
+        self.last_frame = now
+
+    def frame_stats(self):
+        # (p50, p95, p99 frame time in ms, frames per second) over the recent window
+        times = list(self.frame_times)
+        fps = len(times) / sum(times) if times and sum(times) > 0 else 0.0
+        return (1000 * percentile(times, 0.5), 1000 * percentile(times, 0.95), 1000 * percentile(times, 0.99), fps)
+
+    def overlay_text(self, ai_nps=None):
+        p50, p95, p99, fps = self.frame_stats()
+        movegen = sum(self.counts.values())
+        text = f"frame p50 {p50:.1f} p95 {p95:.1f} p99 {p99:.1f} ms  {fps:.0f} fps  movegen {movegen}"
+        if ai_nps is not None:
+            text += f"  AI {ai_nps} n/s"
+        return text
+
+    def summary(self):
+        # Per-label call counts and timing statistics in milliseconds
+        durations = {}
+        for label, _, seconds in self.events:
+            durations.setdefault(label, []).append(seconds)
+        summary = {}
+        for label, values in durations.items():
+            summary[label] = {
+                "calls": len(values),
+                "total_ms": round(1000 * sum(values), 3),
+                "mean_ms": round(1000 * sum(values) / len(values), 4),
+                "p50_ms": round(1000 * percentile(values, 0.5), 4),
+                "p95_ms": round(1000 * percentile(values, 0.95), 4),
+                "max_ms": round(1000 * max(values), 4),
+            }
+        for label, count in self.counts.items():
+            summary[label] = {"calls": count}
+        return summary
+
+    def export(self, path):
+        # Write the session trace: .csv gets one row per event, anything else JSON with a summary
+        events = list(self.events)
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as out:
+                writer = csv.writer(out)
+                writer.writerow(["label", "start_s", "duration_ms", "count"])
+                for label, start, seconds in events:
+                    writer.writerow([label, round(start - self.session_start, 6), round(1000 * seconds, 4), ""])
+                for label, count in self.counts.items():
+                    writer.writerow([label, "", "", count])
+        else:
+            with open(path, "w") as out:
+                json.dump({
+                    "summary": self.summary(),
+                    "events": [{"label": label, "start_s": round(start - self.session_start, 6),
+                                "duration_ms": round(1000 * seconds, 4)} for label, start, seconds in events],
+                }, out)
+
+    def toggle_cprofile(self, path=None):
+        # Start cProfile, or stop it and dump the stats (to path or a timestamped .prof file).
+        # cProfile only sees the thread that started it, i.e. the main loop, not the AI worker.
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+            return None
+        self.cprofile.disable()
+        path = path or time.strftime("profile-%Y%m%d-%H%M%S.prof")
+        self.cprofile.dump_stats(path)
+        self.cprofile = None
+        return path
@@ -0,0 +1,335 @@
+from Player import Pawn, King
+from Bitboard import Bitboard, coords_to_square, square_to_coords, iter_squares, popcount
+from Evaluation import Evaluator
+from Zobrist import side_key
+from Tablebase import WIN, LOSS
+from Constants import BLACK, WHITE, END_ROW_BLACK, END_ROW_WHITE
+
+# Pure-Python rules engine: no pygame import, so it can run headless.
+# Visualiser.Board subclasses Board to add rendering. Board only holds the pieces;
+# GameState is the one place moves are validated, played, taken back and judged.
+
+class Tile:
+    def __init__(self, row, col, board=None):
+        # Initialize tile properties
+        self.row = row
+        self.col = col
+        self.piece = None
+        self.selected = False
+        self.highlighted = False  # Landing square of a legal move of the selected piece
+        self.board = board  # Owning board, told about every piece change
+
+    def set_piece(self, piece):
+        # Set a piece on the tile and update the piece's tile reference
+        old_piece = self.piece
+        self.piece = piece
+        if piece:
+            piece.tile = self
+        if self.board is not None:
+            self.board.piece_changed(self, old_piece, piece)
+
+
+class Board:
+    def __init__(self, evaluator=None):
+        # Initialize board properties
+        self.bitboard = Bitboard()  # Mirrors the tiles; used for fast move generation
+        self.evaluator = evaluator if evaluator is not None else Evaluator()
+        self.score = 0  # Running piece-square score (material included), BLACK minus WHITE
+        # Live pieces per side, kept up to date by piece_changed
+        self.pieces = {BLACK: set(), WHITE: set()}
+        self.tiles = [[self.create_tile(row, col) for col in range(8)] for row in range(8)]
+        self.initialize_pieces()
+        self.state = None  # The GameState playing on this board (turn, points), set by GameState
+
+    def create_tile(self, row, col):
+        # Tile factory, overridden by the rendering board
+        return Tile(row, col, self)
+
+    def piece_changed(self, tile, old_piece, new_piece):
+        # Called by Tile.set_piece, which every move, capture and promotion goes through
+        self.bitboard.set_square(tile.row, tile.col, new_piece)
+        square = coords_to_square(tile.row, tile.col)
+        if old_piece is not None:
+            self.score -= self.evaluator.piece_value(old_piece.color, old_piece.king, square)
+        if new_piece is not None:
+            self.score += self.evaluator.piece_value(new_piece.color, new_piece.king, square)
+        if old_piece is not None:
+            self.pieces[old_piece.color].discard(old_piece)
+        if new_piece is not None:
+            self.pieces[new_piece.color].add(new_piece)
+
+    def get_all_moves(self, color):
+        # Legal moves worked out by the Pawn/King pieces themselves, as bitboard (from, to, captured)
+        # tuples: capture sequences if there are any (capturing is compulsory), else plain moves.
+        # Play goes through GameState.legal_moves; this independent generator is what perft checks it against.
+        captures, moves = set(), []
+        for piece in self.pieces[color]:
+            origin = coords_to_square(piece.row, piece.col)
+            for row, col, captured in piece.get_capture_sequences(self.tiles):
+                mask = sum(1 << coords_to_square(jumped.row, jumped.col) for jumped in captured)
+                captures.add((origin, coords_to_square(row, col), mask))
+            if not captures:
+                moves.extend((origin, coords_to_square(row, col), 0)
+                              for row, col in piece.get_possible_moves(self.tiles))
+        return list(captures) if captures else moves
+
+    def initialize_pieces(self):
+        # Place initial pieces on the board
+        for row in range(3):
+            for col in range(8):
+                if (row + col) % 2 == 1:
+                    self.tiles[row][col].set_piece(Pawn(row, col, WHITE))
+        for row in range(5, 8):
+            for col in range(8):
+                if (row + col) % 2 == 1:
+                    self.tiles[row][col].set_piece(Pawn(row, col, BLACK))
+
+    def make_king(self, piece):
+        # Promote a piece by replacing it with a King on the same tile
+        king = King(piece.row, piece.col, piece.color)
+        self.tiles[piece.row][piece.col].set_piece(king)
+        return king
+
+    def is_piece_attacked(self, piece):
+        # Check if a piece is under attack
+        opponent_color = WHITE if piece.color == BLACK else BLACK
+
+        for opponent_piece in self.pieces[opponent_color]:
+            if opponent_piece.is_valid_move(piece.row + 1, piece.col + 1, self.tiles) or \
+               opponent_piece.is_valid_move(piece.row + 1, piece.col - 1, self.tiles) or \
+               (opponent_piece.king and (opponent_piece.is_valid_move(piece.row - 1, piece.col + 1, self.tiles) or
+                                          opponent_piece.is_valid_move(piece.row - 1, piece.col - 1, self.tiles))):
+                return True
+
+        return False
+
+
+class GameState:
+    def __init__(self, board=None, tablebase=None):
+        # Initialize the game board and game state (headless unless a rendering board is passed in).
+        # With a tablebase, endgames it covers are adjudicated as soon as they are reached.
+        self.board = board if board is not None else Board()
+        self.board.state = self
+        self.tablebase = tablebase
+        self.current_turn = BLACK
+        self.previous_turn = None
+        self.player1_points = 0
+        self.player2_points = 0
+        self.selected_piece = None
+        self.highlighted = []  # Tiles highlighted for the selected piece
+        self.undo_stack = []  # Undo records of the moves played, most recent last
+        self.redo_stack = []  # Bitboard moves that were undone, most recent last
+        self.recorder = None  # Optional PDN.PDNRecorder told about every move played, undone or redone
+        # Legal moves of the current position, computed once and reused until the position changes
+        self.legal_key = None
+        self.legal_cache = []
+        self.legal_by_origin = None
+
+    def switch_turn(self):
+        # Switch the current turn between BLACK and WHITE
+        self.current_turn = WHITE if self.current_turn == BLACK else BLACK
+
+    def get_turn_name(self):
+        # Get the name of the current player
+        return "Player 1" if self.current_turn == BLACK else "Player 2"
+
+    @property
+    def zobrist_key(self):
+        # Position identity: the board's incrementally maintained placement key plus the side to move
+        return self.board.bitboard.hash ^ side_key(self.current_turn)
+
+    def encode(self):
+        # Compact, picklable position: (black, white, kings, side to move), e.g. for worker processes
+        bitboard = self.board.bitboard
+        return bitboard.black, bitboard.white, bitboard.kings, self.current_turn
+
+    def increment_points(self, color, amount=1):
+        # Increment points for the player who captured a piece (a negative amount takes them back)
+        if color == WHITE:
+            self.player1_points += amount
+        else:
+            self.player2_points += amount
+
+    def evaluate(self, color=None):
+        # Static evaluation for color (default: the side to move) from the board's running score
+        color = self.current_turn if color is None else color
+        own, opp = self.board.bitboard.sides(color)
+        score = self.board.score if color == BLACK else -self.board.score
+        return self.board.evaluator.evaluate(own, opp, self.board.bitboard.kings, color, score)
+
+    def legal_moves(self):
+        # Every legal move of the side to move as bitboard (from, to, captured) tuples: compulsory
+        # captures as whole jump sequences, else plain moves. Generated once per position and cached
+        # under its Zobrist key, so clicks, highlighting, the AI and is_game_over all share one list.
+        key = self.zobrist_key
+        if key != self.legal_key:
+            self.legal_cache = self.board.bitboard.get_legal(self.current_turn)
+            self.legal_key = key
+            self.legal_by_origin = None
+        return self.legal_cache
+
+    def moves_from(self, row, col):
+        # Legal moves of the piece on (row, col), grouped from the cached list
+        moves = self.legal_moves()
+        if self.legal_by_origin is None:
+            by_origin = {}
+            for move in moves:
+                by_origin.setdefault(move[0], []).append(move)
+            self.legal_by_origin = by_origin
+        return self.legal_by_origin.get(coords_to_square(row, col), [])
+
+    def find_move(self, piece, new_row, new_col):
+        # The legal move taking piece to (new_row, new_col), or None. Should two capture sequences
+        # end there, the one taking more pieces is played.
+        target = coords_to_square(new_row, new_col)
+        moves = [move for move in self.moves_from(piece.row, piece.col) if move[1] == target]
+        return max(moves, key=lambda move: popcount(move[2])) if moves else None
+
+    def is_game_over(self):
+        # Check if the game is over and return the winner or game state: the side to move
+        # loses when it has no legal move (or no pieces)
+        if not self.legal_moves():
+            return WHITE if self.current_turn == BLACK else BLACK
+        if self.tablebase is not None:
+            bitboard = self.board.bitboard
+            entry = self.tablebase.probe(bitboard.black, bitboard.white, bitboard.kings, self.current_turn)
+            if entry is not None:
+                outcome = entry[0]
+                if outcome == WIN:
+                    return self.current_turn
+                if outcome == LOSS:
+                    return WHITE if self.current_turn == BLACK else BLACK
+                return 0  # Neither side can force a win
+        return None
+
+    def handle_click(self, row, col):
+        # Handle user click on the board
+        clicked_tile = self.board.tiles[row][col]
+
+        if clicked_tile.piece is not None and clicked_tile.piece is self.selected_piece \
+                and self.try_move(self.selected_piece, row, col):
+            # A king's capture sequence can end back on its own square
+            return
+        if clicked_tile.piece and clicked_tile.piece.color == self.current_turn:
+            # Select the clicked piece, or clear the selection when it is clicked again
+            self.select(clicked_tile.piece if clicked_tile.piece is not self.selected_piece else None)
+        elif self.selected_piece:
+            # Try to move the selected piece to the clicked tile
+            self.try_move(self.selected_piece, row, col)
+
+    def select(self, piece):
+        # Select a piece (None clears the selection) and highlight where its legal moves land
+        if self.selected_piece is not None:
+            self.selected_piece.tile.selected = False
+        for tile in self.highlighted:
+            tile.highlighted = False
+        self.selected_piece = piece
+        self.highlighted = []
+        if piece is not None:
+            piece.tile.selected = True
+            for move in self.moves_from(piece.row, piece.col):
+                row, col = square_to_coords(move[1])
+                tile = self.board.tiles[row][col]
+                tile.highlighted = True
+                self.highlighted.append(tile)
+
+    def try_move(self, piece, new_row, new_col):
+        # Attempt to move a piece to a new position; a capture sequence is played in one go by
+        # giving its final landing square. Returns whether the move was legal.
+        move = self.find_move(piece, new_row, new_col)
+        return move is not None and self.play_move(move)
+
+    def play_move(self, move):
+        # Play a bitboard move if it is legal here (AI players hand their choice in through this)
+        if move not in self.legal_moves():
+            return False
+        self.select(None)
+        self.make_move(move)
+        self.redo_stack.clear()
+        self.record_last_move()
+        return True
+
+    def record_last_move(self):
+        # Pass the move on top of the undo stack to the game recorder
+        if self.recorder is not None:
+            self.recorder.record(self.record_move(self.undo_stack[-1]))
+
+    def record_move(self, record):
+        # The bitboard move an undo record was made from
+        _, from_row, from_col, to_row, to_col, captured, _, _ = record
+        return (coords_to_square(from_row, from_col), coords_to_square(to_row, to_col),
+                sum(1 << coords_to_square(piece.row, piece.col) for piece in captured))
+
+    def make_move(self, move):
+        # Apply a bitboard move without validating it and push a compact undo record:
+        # (piece, from_row, from_col, to_row, to_col, captured pieces, promoted, previous turn)
+        origin, target, captured_mask = move
+        from_row, from_col = square_to_coords(origin)
+        new_row, new_col = square_to_coords(target)
+        piece = self.board.tiles[from_row][from_col].piece
+
+        # Every piece jumped in a capture sequence comes off the board at the end of the move
+        captured = []
+        for square in iter_squares(captured_mask):
+            row, col = square_to_coords(square)
+            captured.append(self.board.tiles[row][col].piece)
+            self.board.tiles[row][col].set_piece(None)
+            self.increment_points(captured[-1].color)
+        self.move_piece(piece, new_row, new_col)
+
+        # Check if the piece should be promoted to a king
+        promoted = False
+        if not piece.king and piece.color == BLACK and new_row == END_ROW_BLACK:
+            self.make_king(piece)
+            promoted = True
+        elif not piece.king and piece.color == WHITE and new_row == END_ROW_WHITE:
+            self.make_king(piece)
+            promoted = True
+
+        previous_turn = self.current_turn
+        self.switch_turn()
+        self.undo_stack.append((piece, from_row, from_col, new_row, new_col, tuple(captured), promoted, previous_turn))
+
+    def unmake_move(self):
+        # Reverse the most recent make_move and return its undo record
+        record = self.undo_stack.pop()
+        piece, from_row, from_col, to_row, to_col, captured, promoted, previous_turn = record
+        # On promotion the landing tile holds a new King, so put the original man back instead
+        self.board.tiles[to_row][to_col].set_piece(None)
+        piece.row, piece.col = from_row, from_col
+        self.board.tiles[from_row][from_col].set_piece(piece)
+        for jumped in captured:
+            self.board.tiles[jumped.row][jumped.col].set_piece(jumped)
+            self.increment_points(jumped.color, -1)
+        self.current_turn = previous_turn
+        return record
+
+    def undo(self):
+        # Take back the last move, keeping it for redo
+        if not self.undo_stack:
+            return False
+        self.select(None)
+        self.redo_stack.append(self.record_move(self.unmake_move()))
+        if self.recorder is not None:
+            self.recorder.take_back()
+        return True
+
+    def redo(self):
+        # Replay the last undone move
+        if not self.redo_stack:
+            return False
+        self.select(None)
+        self.make_move(self.redo_stack.pop())
+        self.record_last_move()
+        return True
+
+    def move_piece(self, piece, new_row, new_col):
+        # Move a piece to a new position on the board
+        self.board.tiles[piece.row][piece.col].set_piece(None)
+        piece.row = new_row
+        piece.col = new_col
+        self.board.tiles[new_row][new_col].set_piece(piece)
+
+    def make_king(self, piece):
+        # Promote a piece to a king
+        return self.board.make_king(piece)
@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from Bitboard import Bitboard
+from PDN import PDNError, fen, move_text, parse_move, result_text
+from Profiler import percentile
+from Rules import GameState
+from Tournament import ENGINES, load_engine
+from Constants import BLACK, WHITE
+
+# Many headless games in one process. Clients connect over TCP or a Unix socket
+# and talk in JSON lines: one request object per line, one reply object per line.
+#
+#   {"cmd": "new", "ai": "white", "engine": "alphabeta", "time_limit": 0.2}
+#   {"cmd": "move", "game": 1, "move": "11-15"}      (PDN squares, "x" for captures)
+#   {"cmd": "state", "game": 1}
+#   {"cmd": "close", "game": 1}
+#   {"cmd": "stats"}
+#
+# Game replies carry the position as a PDN FEN, the side to move, its legal moves,
+# the result so far and the moves played by the request (the AI reply included).
+# AI turns run in a shared process pool. At most one search per worker runs at a
+# time; further requests wait, and once max_queue are waiting new ones are refused
+# with "server busy" so clients back off instead of piling up.
+
+COLORS = {"black": BLACK, "white": WHITE}
+COLOR_NAMES = {BLACK: "black", WHITE: "white"}
+
+_engines = {}  # Engines built in this pool process, kept between requests (tables, trees)
+
+
+def _choose_move(engine, position, time_limit):
+    # Pool worker: search a position (GameState.encode format) and return (move, nodes)
+    black, white, kings, color = position
+    player = _engines.get((engine, color))
+    if player is None:
+        # One process per engine: the pool already has a worker per core, and cached engines live as long as it
+        player = _engines[engine, color] = load_engine(engine, color, time_limit, workers=1)
+    if hasattr(player, "time_limit"):
+        player.time_limit = time_limit
+    player.stop_requested = False
+    move = player.choose_move(Bitboard(black, white, kings), color)
+    return move, player.nodes
+
+
+class RequestError(Exception):
+    # A request that cannot be served; its message goes back to the client
+    pass
+
+
+class ServerGame:
+    def __init__(self, game_id, ai_color, engine, time_limit):
+        self.id = game_id
+        self.state = GameState()
+        self.ai_color = ai_color  # None for a game between two clients' moves
+        self.engine = engine
+        self.time_limit = time_limit
+        self.busy = False  # An AI search for this game is queued or running
+
+
+class GameServer:
+    def __init__(self, workers=None, max_queue=64, time_limit=0.2, max_time_limit=5.0, latency_window=1000):
+        # workers processes search AI moves; max_queue caps the requests waiting for one;
+        # time_limit is the default AI budget per move, max_time_limit the most a request may ask for
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.max_queue = max_queue
+        self.time_limit = time_limit
+        self.max_time_limit = max_time_limit
+        self.games = {}
+        self.game_ids = itertools.count(1)
+        self.sessions = 0
+        self.waiting = 0  # AI requests queued for a worker
+        self.running = 0  # AI requests being searched
+        self.ai_moves = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=latency_window)  # Seconds from request to AI move, queueing included
+        self.started = time.perf_counter()
+
+    async def handle_client(self, reader, writer):
+        # One connection: read request lines and answer each in turn. Games opened on the
+        # connection are closed with it. Replies are drained before the next line is read,
+        # so a client that stops reading stops being served.
+        self.sessions += 1
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply = await self.dispatch(line, owned)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions -= 1
+            for game_id in owned:
+                self.games.pop(game_id, None)
+            writer.close()
+
+    async def dispatch(self, line, owned):
+        # Decode one request and run its command; errors become {"ok": false, "error": ...}
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("a request is a JSON object")
+            command = request.get("cmd")
+            if command == "new":
+                reply = await self.new_game(request, owned)
+            elif command == "move":
+                reply = await self.play(self.game(request, owned), request)
+            elif command == "state":
+                reply = self.game_reply(self.game(request, owned), [])
+            elif command == "close":
+                game = self.game(request, owned)
+                owned.discard(game.id)
+                self.games.pop(game.id, None)
+                reply = {"ok": True, "game": game.id, "closed": True}
+            elif command == "stats":
+                reply = dict(self.stats(), ok=True)
+            else:
+                raise RequestError(f"unknown command: {command!r}")
+        except (RequestError, PDNError, ValueError) as error:
+            reply = {"ok": False, "error": str(error)}
+        except Exception as error:
+            # A failed search must not take the connection (or the server) down with it
+            reply = {"ok": False, "error": f"internal error: {type(error).__name__}: {error}"}
+        if isinstance(request, dict) and "id" in request:
+            reply["id"] = request["id"]  # Lets clients match replies to requests
+        return reply
+
+    def game(self, request, owned):
+        game_id = request.get("game")
+        if game_id not in owned:
+            raise RequestError(f"no game {game_id!r} on this connection")
+        return self.games[game_id]
+
+    def budget(self, request, default):
+        # Per-request AI time budget, within the server's limit
+        time_limit = request.get("time_limit", default)
+        # bool is a subclass of int, so true would otherwise pass as one second; json also reads NaN and
+        # Infinity, which would leave the search without a deadline
+        if (isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)) or not math.isfinite(time_limit)
+                or time_limit <= 0):
+            raise RequestError("time_limit must be a positive number of seconds")
+        return min(float(time_limit), self.max_time_limit)
+
+    async def new_game(self, request, owned):
+        ai = request.get("ai")
+        if ai is not None and ai not in COLORS:
+            raise RequestError("ai must be \"black\", \"white\" or null")
+        engine = request.get("engine", "alphabeta")
+        if engine not in ENGINES:
+            raise RequestError(f"unknown engine {engine!r} (one of {', '.join(ENGINES)})")
+        if ai == "black":
+            self.admit()
+        game = ServerGame(next(self.game_ids), COLORS.get(ai), engine, self.budget(request, self.time_limit))
+        self.games[game.id] = game
+        owned.add(game.id)
+        # The AI opens when it plays BLACK
+        played = await self.ai_turn(game, game.time_limit)
+        return self.game_reply(game, played)
+
+    async def play(self, game, request):
+        # A client move, checked against the rules, then the AI's reply
+        state = game.state
+        if game.busy:
+            raise RequestError("the AI is still thinking in this game")
+        if state.is_game_over() is not None:
+            raise RequestError("the game is over")
+        if state.current_turn == game.ai_color:
+            raise RequestError("it is the AI's turn")
+        text = request.get("move")
+        if not isinstance(text, str):
+            raise RequestError("move must be PDN text such as \"11-15\"")
+        move = parse_move(state, text)
+        time_limit = self.budget(request, game.time_limit)
+        if game.ai_color is not None:
+            # Refuse before the move is played, so a refused client can simply send it again
+            self.admit()
+        state.play_move(move)
+        played = [move_text(move)]
+        played += await self.ai_turn(game, time_limit)
+        return self.game_reply(game, played)
+
+    def admit(self):
+        # Backpressure: refuse work that would need an AI search once too many are waiting
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise RequestError("server busy, try again")
+
+    async def ai_turn(self, game, time_limit):
+        # Search and play the AI's move if it is to move; returns the PDN text of what it played
+        state = game.state
+        if game.ai_color is None or state.current_turn != game.ai_color or state.is_game_over() is not None:
+            return []
+        game.busy = True
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with self.slots:
+                self.waiting -= 1
+                self.running += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    move, _ = await loop.run_in_executor(self.pool, _choose_move, game.engine, state.encode(),
+                                                         time_limit)
+                finally:
+                    self.running -= 1
+        finally:
+            game.busy = False
+        self.latencies.append(time.perf_counter() - start)
+        self.ai_moves += 1
+        # The game may have been closed while the search ran
+        if move is None or game.id not in self.games or not state.play_move(move):
+            return []
+        return [move_text(move)]
+
+    def game_reply(self, game, played):
+        state = game.state
+        return {
+            "ok": True,
+            "game": game.id,
+            "fen": fen(state),
+            "turn": COLOR_NAMES[state.current_turn],
+            "legal": [move_text(move) for move in state.legal_moves()],
+            "result": result_text(state.is_game_over()),
+            "played": played,
+        }
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            "sessions": self.sessions,
+            "games": len(self.games),
+            "workers": self.workers,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "ai_moves": self.ai_moves,
+            "rejected": self.rejected,
+            "latency_ms": {
+                "p50": round(1000 * percentile(latencies, 0.5), 2),
+                "p95": round(1000 * percentile(latencies, 0.95), 2),
+                "p99": round(1000 * percentile(latencies, 0.99), 2),
+                "max": round(1000 * max(latencies), 2) if latencies else 0.0,
+            },
+            "uptime_s": round(time.perf_counter() - self.started, 1),
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host="127.0.0.1", port=8765, unix=None, **options):
+    # Run a GameServer until cancelled
+    server = GameServer(**options)
+    if unix:
+        listener = await asyncio.start_unix_server(server.handle_client, path=unix)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+    where = unix or ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"serving on {where} with {server.workers} AI workers")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many checkers games over JSON lines (see Client.py).")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="AI worker processes (default: all cores)")
+    parser.add_argument("--max-queue", type=int, default=64, help="AI requests allowed to wait before refusing more")
+    parser.add_argument("--time-limit", type=float, default=0.2, help="default AI seconds per move")
+    parser.add_argument("--max-time-limit", type=float, default=5.0, help="most AI seconds a request may ask for")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, max_queue=args.max_queue,
+                          time_limit=args.time_limit, max_time_limit=args.max_time_limit))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import argparse
+import mmap
+import struct
+import time
+from array import array
+from itertools import combinations
+from Bitboard import SQUARES, generate_legal, apply_move, winner, popcount
+from Constants import BLACK, WHITE
+
+# Endgame tablebase: every position with up to N pieces, solved by retrograde
+# analysis and stored one byte per position in an indexed file that is probed
+# through mmap (no load time, only the touched pages become resident).
+#
+# Positions are stored from the side to move's point of view. With WHITE to move
+# the board is turned half a circle and the colours swapped, so "own" pieces always
+# move up the board like BLACK. (Mirroring left to right is no symmetry here: it
+# maps the playing squares onto the light ones.) The table is split into material
+# slices (own men, own kings, opponent men, opponent kings); within a slice
+#   ((rank of own men among squares 4-31) * C(28, opponent men) + rank of opponent men among squares 0-27)
+#   * C(free, own kings) + rank of own kings among the free squares, and so on for opponent kings
+# where men never stand on the row that would have crowned them and ranks are colex.
+#
+# Value byte, from the side to move's point of view:
+#   0 = draw (or unreachable), 1 + 2d = win in d plies, 2 + 2d = loss in d plies.
+
+MAGIC = b"CKTB"
+RULES_VERSION = 2  # Bump whenever the move rules change; old files are refused
+LAYOUT = 2  # Bump whenever the index changes; 2: side-to-move symmetry and material slices
+HEADER = struct.Struct("<4sBBBx")  # magic, rules version, max pieces, layout
+MAX_DISTANCE = 126
+MAN_SQUARES = 28  # Squares a man can stand on: all but the row that crowns it
+MAX_PAIR = 1 << 32  # Generation numbers the positions of a slice pair in 32-bit arrays
+PAIR_BYTES = 100  # Rough memory per position of the pair being solved, its moves included (about 7 each)
+
+WIN, DRAW, LOSS = 1, 0, -1
+
+BINOMIAL = [[0] * 33 for _ in range(33)]
+for n in range(33):
+    BINOMIAL[n][0] = 1
+    for r in range(1, n + 1):
+        BINOMIAL[n][r] = BINOMIAL[n - 1][r - 1] + BINOMIAL[n - 1][r]
+
+_REVERSED_BYTE = [int(f"{byte:08b}"[::-1], 2) for byte in range(256)]
+
+
+def rotate(bitboard):
+    # The board turned half a circle: square s becomes 31 - s
+    return ((_REVERSED_BYTE[bitboard & 0xFF] << 24) | (_REVERSED_BYTE[(bitboard >> 8) & 0xFF] << 16)
+            | (_REVERSED_BYTE[(bitboard >> 16) & 0xFF] << 8) | _REVERSED_BYTE[bitboard >> 24])
+
+
+def slice_size(material):
+    own_men, own_kings, opp_men, opp_kings = material
+    free = SQUARES - own_men - opp_men
+    return (BINOMIAL[MAN_SQUARES][own_men] * BINOMIAL[MAN_SQUARES][opp_men]
+            * BINOMIAL[free][own_kings] * BINOMIAL[free - own_kings][opp_kings])
+
+
+def slice_pairs(max_pieces):
+    # Material slices in solving order, each with its colour swap: moves that neither capture nor
+    # crown only lead from one to the other, and every other move leads to an earlier pair
+    # (fewer pieces, or fewer men)
+    pairs = []
+    for pieces in range(1, max_pieces + 1):
+        for men in range(pieces + 1):
+            for own_men in range(men + 1):
+                for own_kings in range(pieces - men + 1):
+                    material = (own_men, own_kings, men - own_men, pieces - men - own_kings)
+                    swapped = material[2:] + material[:2]
+                    if material <= swapped:
+                        pairs.append((material,) if material == swapped else (material, swapped))
+    return pairs
+
+
+def table_offsets(max_pieces):
+    # First index of every slice, the (slices, start, size) of every pair and the table size
+    offsets, pairs, size = {}, [], 0
+    for pair in slice_pairs(max_pieces):
+        start = size
+        for material in pair:
+            offsets[material] = size
+            size += slice_size(material)
+        pairs.append((pair, start, size - start))
+    return offsets, pairs, size
+
+
+def check_pieces(max_pieces, memory_gb=8):
+    # Refuse piece counts whose slice pairs do not fit the 32-bit arrays used while solving them,
+    # or would need more than memory_gb to solve. Returns the table size and the largest pair.
+    if max_pieces < 1:
+        raise ValueError("a tablebase needs at least 1 piece")
+    _, pairs, size = table_offsets(max_pieces)
+    largest = max(pair_size for _, _, pair_size in pairs)
+    if largest >= MAX_PAIR:
+        raise ValueError(f"{max_pieces} pieces need {largest} positions in one slice pair; "
+                         f"at most {MAX_PAIR - 1} are supported")
+    needed = largest * PAIR_BYTES / 2 ** 30
+    if needed > memory_gb:
+        raise ValueError(f"{max_pieces} pieces need about {needed:.0f} GB to solve the largest slice pair "
+                         f"({largest} positions); the limit is {memory_gb} GB")
+    return size, largest
+
+
+def _rank(bitboard, first=0):
+    # Colex rank of the squares in bitboard, numbered from square first
+    rank, count = 0, 0
+    while bitboard:
+        low = bitboard & -bitboard
+        count += 1
+        rank += BINOMIAL[low.bit_length() - 1 - first][count]
+        bitboard ^= low
+    return rank
+
+
+def _rank_among(bitboard, taken):
+    # Colex rank of the squares in bitboard, numbering only the squares not in taken
+    rank, count = 0, 0
+    while bitboard:
+        low = bitboard & -bitboard
+        count += 1
+        rank += BINOMIAL[low.bit_length() - 1 - popcount(taken & (low - 1))][count]
+        bitboard ^= low
+    return rank
+
+
+def position_index(black, white, kings, color, offsets):
+    if color == BLACK:
+        own, opp = black, white
+    else:
+        own, opp, kings = rotate(white), rotate(black), rotate(kings)
+    own_men, own_kings, opp_men, opp_kings = own & ~kings, own & kings, opp & ~kings, opp & kings
+    material = (popcount(own_men), popcount(own_kings), popcount(opp_men), popcount(opp_kings))
+    men = own_men | opp_men
+    free = SQUARES - material[0] - material[2]
+    index = _rank(own_men, SQUARES - MAN_SQUARES) * BINOMIAL[MAN_SQUARES][material[2]] + _rank(opp_men)
+    index = index * BINOMIAL[free][material[1]] + _rank_among(own_kings, men)
+    index = index * BINOMIAL[free - material[1]][material[3]] + _rank_among(opp_kings, men | own_kings)
+    return offsets[material] + index
+
+
+def _encode(result, distance):
+    distance = min(distance, MAX_DISTANCE)
+    return 1 + 2 * distance if result == WIN else 2 + 2 * distance
+
+
+def _decode(code):
+    # Returns (result, distance) for a value byte
+    if code == 0:
+        return DRAW, 0
+    if code & 1:
+        return WIN, (code - 1) // 2
+    return LOSS, (code - 2) // 2
+
+
+def slice_positions(material):
+    # Every (own, opp, kings) of a slice, own moving up the board like BLACK
+    own_men_count, own_kings_count, opp_men_count, opp_kings_count = material
+    all_squares = range(SQUARES)
+    for own_men in combinations(range(SQUARES - MAN_SQUARES, SQUARES), own_men_count):
+        own_men_mask = sum(1 << square for square in own_men)
+        for opp_men in combinations(range(MAN_SQUARES), opp_men_count):
+            opp_men_mask = sum(1 << square for square in opp_men)
+            if own_men_mask & opp_men_mask:
+                continue  # Unreachable index, left a draw
+            men = own_men_mask | opp_men_mask
+            free = [square for square in all_squares if not men >> square & 1]
+            for own_kings in combinations(free, own_kings_count):
+                own_kings_mask = sum(1 << square for square in own_kings)
+                rest = [square for square in free if not own_kings_mask >> square & 1]
+                for opp_kings in combinations(rest, opp_kings_count):
+                    opp_kings_mask = sum(1 << square for square in opp_kings)
+                    yield (own_men_mask | own_kings_mask, opp_men_mask | opp_kings_mask,
+                           own_kings_mask | opp_kings_mask)
+
+
+def solve_pair(values, pair, start, size, offsets):
+    # Retrograde analysis of one slice pair. Moves into earlier pairs are looked up in values
+    # (already solved); moves inside the pair are kept as edges until the pair is done.
+    end = start + size
+    remaining = bytearray(size)  # Moves inside the pair not yet known to let the opponent win
+    escapes = bytearray(size)  # A move into an earlier pair draws or wins, so the position is never lost
+    longest = bytearray(size)  # Loss distance through the moves into earlier pairs
+    edge_child, edge_parent = array("I"), array("I")
+    wins, losses = {}, {0: array("I")}  # Positions to settle, by distance
+
+    for material in pair:
+        for own, opp, kings in slice_positions(material):
+            local = position_index(own, opp, kings, BLACK, offsets) - start
+            if winner(own, opp, kings, BLACK) is not None:
+                losses[0].append(local)  # No legal move: lost at once
+                continue
+            for move in generate_legal(own, opp, kings, BLACK):
+                new_own, new_opp, new_kings = apply_move(own, opp, kings, move, BLACK)
+                child = position_index(new_own, new_opp, new_kings, WHITE, offsets)
+                if start <= child < end:
+                    edge_child.append(child - start)
+                    edge_parent.append(local)
+                    remaining[local] += 1
+                    continue
+                result, distance = _decode(values[child])
+                if result == WIN:
+                    longest[local] = max(longest[local], distance + 1)
+                    continue
+                escapes[local] = 1
+                if result == LOSS:
+                    wins.setdefault(distance + 1, array("I")).append(local)
+            if remaining[local] == 0 and not escapes[local]:
+                # Every move leads to an earlier pair where the opponent wins
+                losses.setdefault(longest[local], array("I")).append(local)
+
+    # Group the edges by child so each position can find its parents
+    parent_start = array("Q", bytes(8 * (size + 1)))
+    for child in edge_child:
+        parent_start[child + 1] += 1
+    for index in range(size):
+        parent_start[index + 1] += parent_start[index]
+    fill = array("Q", parent_start)
+    parents = array("I", bytes(4 * len(edge_child)))
+    for child, parent in zip(edge_child, edge_parent):
+        parents[fill[child]] = parent
+        fill[child] += 1
+    del edge_child, edge_parent, fill
+
+    # Settle positions in order of increasing distance
+    distance = 0
+    while distance <= max(max(wins, default=0), max(losses, default=0)):
+        for result, settled in ((WIN, wins.pop(distance, ())), (LOSS, losses.pop(distance, ()))):
+            for local in settled:
+                if values[start + local]:
+                    continue
+                values[start + local] = _encode(result, distance)
+                for position in range(parent_start[local], parent_start[local + 1]):
+                    parent = parents[position]
+                    if values[start + parent]:
+                        continue
+                    if result == LOSS:
+                        # A move into a lost position for the opponent wins
+                        wins.setdefault(distance + 1, array("I")).append(parent)
+                    else:
+                        remaining[parent] -= 1
+                        if remaining[parent] == 0 and not escapes[parent]:
+                            # Every move lets the opponent win: lost, as late as possible
+                            losses.setdefault(max(distance + 1, longest[parent]), array("I")).append(parent)
+        distance += 1
+    return len(parents)
+
+
+def generate(max_pieces, path, progress=print, memory_gb=8):
+    # Solve every position with 1..max_pieces pieces, slice pair by slice pair, straight into the
+    # memory-mapped output file
+    size, largest = check_pieces(max_pieces, memory_gb)
+    offsets, pairs, _ = table_offsets(max_pieces)
+    progress(f"{size} positions, at most {largest} solved at a time")
+    with open(path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, RULES_VERSION, max_pieces, LAYOUT))
+        out.truncate(HEADER.size + size)
+    start_time = time.perf_counter()
+    with open(path, "r+b") as out, mmap.mmap(out.fileno(), 0) as data:
+        values = memoryview(data)[HEADER.size:]
+        try:
+            for pair, start, pair_size in pairs:
+                moves = solve_pair(values, pair, start, pair_size, offsets)
+                progress(f"solved {' and '.join(map(str, pair))}: {pair_size} positions, {moves} moves inside "
+                         f"the pair ({time.perf_counter() - start_time:.1f}s)")
+        finally:
+            values.release()
+    progress(f"solved {size} positions in {time.perf_counter() - start_time:.1f}s")
+
+
+class Tablebase:
+    def __init__(self, path):
+        # Memory-map a generated table; nothing is read until it is probed
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, layout = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a checkers tablebase")
+        if version != RULES_VERSION:
+            raise ValueError(f"{path} was built for rules version {version}, expected {RULES_VERSION}")
+        if layout != LAYOUT:
+            raise ValueError(f"{path} uses index layout {layout}, expected {LAYOUT}; generate it again")
+        self.offsets = table_offsets(self.max_pieces)[0]
+
+    def probe(self, black, white, kings, color):
+        # (result, distance in plies) for the side to move, or None if the position has too many pieces
+        pieces = popcount(black | white)
+        if pieces == 0 or pieces > self.max_pieces:
+            return None
+        return _decode(self.data[HEADER.size + position_index(black, white, kings, color, self.offsets)])
+
+    def __getstate__(self):
+        # A pickled table (e.g. inside a player sent to a worker process) reopens the file on arrival
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a checkers endgame tablebase.")
+    parser.add_argument("-n", "--pieces", type=int, default=3,
+                        help="largest number of pieces on the board (3 takes seconds, 4 minutes, 5 hours)")
+    parser.add_argument("-o", "--output", default="endgame.tb", help="output file")
+    parser.add_argument("--memory-gb", type=float, default=8, help="refuse piece counts needing more memory")
+    args = parser.parse_args()
+    try:
+        check_pieces(args.pieces, args.memory_gb)
+    except ValueError as error:
+        parser.error(str(error))
+    generate(args.pieces, args.output, memory_gb=args.memory_gb)
+
+
+if __name__ == "__main__":
+    main()
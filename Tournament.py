@@ -0,0 +1,194 @@
+import argparse
+import importlib
+import inspect
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Rules import GameState
+from Tablebase import Tablebase
+from OpeningBook import OpeningBook
+from Constants import BLACK, WHITE
+
+# Engines selectable by name; anything else is loaded as "Module:Class"
+ENGINES = {
+    "random": ("AI_Player", "AIPlayer"),
+    "alphabeta": ("AlphaBeta_Player", "AlphaBetaPlayer"),
+    "mcts": ("MCTS_Player", "MCTSPlayer"),
+    "lazysmp": ("LazySMP_Player", "LazySMPPlayer"),
+}
+
+
+def load_engine(spec, color, time_limit=None, tablebase=None, book=None, weights=None, workers=None):
+    # Build an AIPlayer-compatible engine (anything with .color and .make_move(game_state)).
+    # weights goes to engines with an evaluation (see Evaluation.load_evaluator); workers caps the
+    # processes of parallel engines (Lazy SMP), which is needed wherever the engine runs in a pool.
+    module_name, class_name = ENGINES[spec] if spec in ENGINES else spec.split(":")
+    engine_class = getattr(importlib.import_module(module_name), class_name)
+    parameters = inspect.signature(engine_class).parameters
+    options = {}
+    if time_limit is not None and "time_limit" in parameters:
+        options["time_limit"] = time_limit
+    if tablebase is not None and "tablebase" in parameters:
+        options["tablebase"] = tablebase
+    if book is not None and "book" in parameters:
+        options["book"] = book
+    if weights is not None and "weights" in parameters:
+        options["weights"] = weights
+    if workers is not None and "workers" in parameters:
+        options["workers"] = workers
+    return engine_class(color, **options)
+
+
+def play_game(index, engine_a, engine_b, time_limit, max_moves, no_progress_limit, seed, tablebase_path=None,
+              book_path=None, weights_a=None, weights_b=None, engine_workers=1):
+    # Play one headless game. Engine A takes BLACK in even games and WHITE in odd ones.
+    # With a tablebase, engines that accept one use it and covered endgames are adjudicated;
+    # with a book, engines that accept one open from it. weights_a/weights_b set each engine's evaluation;
+    # engine_workers is the processes a parallel engine may use (this game already runs in a pool).
+    random.seed(seed + index)
+    tablebase = Tablebase(tablebase_path) if tablebase_path else None
+    book = OpeningBook(book_path) if book_path else None
+    a_color = BLACK if index % 2 == 0 else WHITE
+    b_color = WHITE if a_color == BLACK else BLACK
+    engines = {a_color: load_engine(engine_a, a_color, time_limit, tablebase, book, weights_a, engine_workers),
+               b_color: load_engine(engine_b, b_color, time_limit, tablebase, book, weights_b, engine_workers)}
+    state = GameState(tablebase=tablebase)
+    plies, quiet_plies, reason = 0, 0, None
+    winner = state.is_game_over()
+    start = time.perf_counter()
+
+    while winner is None:
+        if plies >= max_moves:
+            reason = "move limit"
+            break
+        if quiet_plies >= no_progress_limit:
+            reason = "no progress"
+            break
+        moves_before = len(state.undo_stack)
+        engines[state.current_turn].make_move(state)
+        if len(state.undo_stack) == moves_before:
+            reason = "no move played"
+            break
+        plies += 1
+        # Captures, promotions and man moves are progress; king shuffles are not
+        piece, _, _, _, _, captured, promoted, _ = state.undo_stack[-1]
+        quiet_plies = 0 if captured or promoted or not piece.king else quiet_plies + 1
+        winner = state.is_game_over()
+
+    # A tablebase verdict ends the game while both sides can still move
+    adjudicated = tablebase is not None and winner is not None and state.board.bitboard.winner(state.current_turn) is None
+    # Engines holding processes or shared memory (Lazy SMP) release them here
+    for engine in engines.values():
+        if hasattr(engine, "close"):
+            engine.close()
+    if tablebase is not None:
+        tablebase.close()
+    if book is not None:
+        book.close()
+    if winner in (BLACK, WHITE):
+        result = "A" if winner == a_color else "B"
+        reason = reason or ("tablebase win" if adjudicated else "win")
+    else:
+        result = "draw"
+        reason = reason or "tablebase draw"
+    return {
+        "game": index,
+        "black": engine_a if a_color == BLACK else engine_b,
+        "white": engine_b if a_color == BLACK else engine_a,
+        "result": result,
+        "reason": reason,
+        "plies": plies,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def elo_estimate(wins, draws, losses):
+    # Elo difference of A over B with a 95% confidence half-width, from the per-game score variance
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, float("inf")
+    score = (wins + 0.5 * draws) / games
+    if score <= 0 or score >= 1:
+        return (float("inf") if score >= 1 else float("-inf")), float("inf")
+    elo = -400 * math.log10(1 / score - 1)
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    error = 1.96 * math.sqrt(variance / games) * 400 / (math.log(10) * score * (1 - score))
+    return elo, error
+
+
+def summarize(records, engine_a, engine_b):
+    wins = sum(1 for record in records if record["result"] == "A")
+    losses = sum(1 for record in records if record["result"] == "B")
+    draws = len(records) - wins - losses
+    elo, error = elo_estimate(wins, draws, losses)
+    return {
+        "summary": True,
+        "engine_a": engine_a,
+        "engine_b": engine_b,
+        "games": len(records),
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "average_plies": sum(record["plies"] for record in records) / len(records) if records else 0,
+        # A clean sweep has no finite estimate; JSON gets null instead of Infinity
+        "elo": elo if math.isfinite(elo) else None,
+        "elo_error": error if math.isfinite(error) else None,
+    }
+
+
+def run_tournament(engine_a, engine_b, games, output, workers=None, time_limit=None,
+                   max_moves=200, no_progress_limit=50, seed=0, tablebase_path=None,
+                   book_path=None, weights_a=None, weights_b=None):
+    # Spread games over a process pool and stream each result to disk as soon as it finishes
+    workers = workers or os.cpu_count() or 1
+    # Parallel engines share out the cores the games leave free, so -j <cores> gives them one process each
+    engine_workers = max(1, (os.cpu_count() or 1) // workers)
+    records = []
+    with open(output, "w") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, index, engine_a, engine_b, time_limit, max_moves, no_progress_limit,
+                               seed, tablebase_path, book_path, weights_a, weights_b, engine_workers)
+                   for index in range(games)]
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+        summary = summarize(records, engine_a, engine_b)
+        out.write(json.dumps(summary) + "\n")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless games between two checkers engines.")
+    parser.add_argument("engine_a", help="engine name (%s) or Module:Class" % ", ".join(ENGINES))
+    parser.add_argument("engine_b", help="engine name (%s) or Module:Class" % ", ".join(ENGINES))
+    parser.add_argument("-n", "--games", type=int, default=100, help="number of games (colours alternate)")
+    parser.add_argument("-o", "--output", default="tournament.jsonl", help="JSON-lines results file")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move for searching engines")
+    parser.add_argument("--max-moves", type=int, default=200, help="plies before the game is adjudicated a draw")
+    parser.add_argument("--no-progress", type=int, default=50,
+                        help="plies of king moves without a capture or promotion before a draw")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--tablebase", default=None, help="endgame tablebase file for the engines and adjudication")
+    parser.add_argument("--book", default=None, help="opening book file for the engines")
+    parser.add_argument("--weights-a", default=None, help="evaluation for engine A (JSON weights or trained .npz)")
+    parser.add_argument("--weights-b", default=None, help="evaluation for engine B (JSON weights or trained .npz)")
+    args = parser.parse_args()
+
+    summary = run_tournament(args.engine_a, args.engine_b, args.games, args.output, args.workers,
+                             args.time_limit, args.max_moves, args.no_progress, args.seed, args.tablebase,
+                             args.book, args.weights_a, args.weights_b)
+    print(f"{args.engine_a} vs {args.engine_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']} "
+          f"in {summary['games']} games, average {summary['average_plies']:.1f} plies")
+    if summary["elo"] is None or summary["elo_error"] is None:
+        print("Elo difference: not measurable (one engine won or lost every game)")
+    else:
+        print(f"Elo difference: {summary['elo']:+.0f} +/- {summary['elo_error']:.0f}")
+
+
+if __name__ == "__main__":
+    main()
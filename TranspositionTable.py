@@ -0,0 +1,124 @@
+from array import array
+from multiprocessing import shared_memory
+
+# Bound types stored with each score
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Each slot is two 64-bit words: the position key XOR the data word, and the
+# data word itself. Storing the key XORed with its data means a torn or
+# overwritten slot simply fails the key check instead of returning garbage.
+SLOT_BYTES = 16
+SLOTS_PER_BUCKET = 2  # Slot 0 is depth-preferred, slot 1 is always-replace
+
+# Data word layout
+_SCORE_BITS = 32
+_SCORE_OFFSET = 1 << 31
+_DEPTH_SHIFT = 32
+_FLAG_SHIFT = 40
+_MOVE_SHIFT = 42  # origin (5 bits), target (5 bits), present flag (1 bit)
+_AGE_SHIFT = 53
+
+
+def _pack(score, depth, flag, move, age):
+    data = (score + _SCORE_OFFSET) | (depth << _DEPTH_SHIFT) | (flag << _FLAG_SHIFT) | ((age & 0xFF) << _AGE_SHIFT)
+    if move is not None:
+        data |= (move[0] | (move[1] << 5) | (1 << 10)) << _MOVE_SHIFT
+    return data
+
+
+class TranspositionTable:
+    def __init__(self, memory_mb=16, shared=False, name=None):
+        # Fixed-size two-tier table; the bucket count is the largest power of two fitting the memory cap.
+        # shared=True places it in a new shared memory block that other processes attach to by name
+        # (see attach); the key^data slot format keeps concurrent lock-free writers safe.
+        buckets = 1
+        while buckets * 2 * SLOTS_PER_BUCKET * SLOT_BYTES <= memory_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.memory_mb = memory_mb
+        slots = buckets * SLOTS_PER_BUCKET
+        self.shm = None
+        self.owner = False
+        if shared or name is not None:
+            self.owner = name is None
+            self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * SLOT_BYTES)
+            self.words = self.shm.buf.cast('Q')
+            self.keys = self.words[:slots]
+            self.data = self.words[slots:2 * slots]
+        else:
+            self.keys = array('Q', bytes(slots * 8))
+            self.data = array('Q', bytes(slots * 8))
+        self.age = 0
+        self.hits = 0
+        self.probes = 0
+
+    @classmethod
+    def attach(cls, name, memory_mb):
+        # Open a shared table created by another process
+        return cls(memory_mb, name=name)
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm is not None else None
+
+    def close(self):
+        # Release a shared table; the creating process also frees the memory
+        if self.shm is None:
+            return
+        self.keys.release()
+        self.data.release()
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+    def new_search(self):
+        # Entries from earlier searches become preferred victims for replacement
+        self.age = (self.age + 1) & 0xFF
+        self.hits = 0
+        self.probes = 0
+
+    def clear(self):
+        # Empty every slot in one go: fresh arrays, or the shared block zeroed in place for the attached processes
+        if self.shm is not None:
+            self.shm.buf[:] = bytes(len(self.shm.buf))
+        else:
+            self.keys = array('Q', bytes(len(self.keys) * 8))
+            self.data = array('Q', bytes(len(self.data) * 8))
+
+    def probe(self, key):
+        # Return (depth, flag, score, move) for a stored position, or None.
+        # move is an (origin, target) pair or None.
+        self.probes += 1
+        base = (key & self.mask) * SLOTS_PER_BUCKET
+        for index in (base, base + 1):
+            data = self.data[index]
+            if data and self.keys[index] ^ data == key:
+                self.hits += 1
+                move = None
+                packed_move = data >> _MOVE_SHIFT
+                if packed_move & (1 << 10):
+                    move = (packed_move & 31, (packed_move >> 5) & 31)
+                return ((data >> _DEPTH_SHIFT) & 0xFF, (data >> _FLAG_SHIFT) & 3,
+                        (data & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET, move)
+        return None
+
+    def store(self, key, depth, flag, score, move=None):
+        base = (key & self.mask) * SLOTS_PER_BUCKET
+        data = _pack(score, depth, flag, move, self.age)
+        preferred = self.data[base]
+        # The depth-preferred slot takes the entry if it is empty, holds the same
+        # position, is stale, or was searched less deeply; otherwise use slot 1
+        if (not preferred
+                or self.keys[base] ^ preferred == key
+                or (preferred >> _AGE_SHIFT) & 0xFF != self.age
+                or (preferred >> _DEPTH_SHIFT) & 0xFF <= depth):
+            index = base
+        else:
+            index = base + 1
+        self.keys[index] = key ^ data
+        self.data[index] = data
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
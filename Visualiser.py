@@ -1,21 +1,41 @@
 import pygame
-from Player import Piece, Pawn, King
-from Constants import BLACK, WHITE, END_ROW_BLACK, END_ROW_WHITE
-
-class Tile:
-    def __init__(self, row, col, tile_size):
-        # Initialize tile properties
-        self.row = row
-        self.col = col
-        self.piece = None
-        self.selected = False
+import Rules
+
+class Tile(Rules.Tile):
+    def __init__(self, row, col, tile_size, board=None, dirty_tiles=None):
+        # Initialize tile properties; dirty_tiles is the board-wide set of tiles needing a redraw
         self.tile_size = tile_size
+        self.dirty_tiles = dirty_tiles if dirty_tiles is not None else set()
+        super().__init__(row, col, board)
+
+    @property
+    def selected(self):
+        return self._selected
+
+    @selected.setter
+    def selected(self, value):
+        # Selection changes the outline, so the tile has to be redrawn
+        self._selected = value
+        self.dirty_tiles.add(self)
+
+    @property
+    def highlighted(self):
+        return self._highlighted
+
+    @highlighted.setter
+    def highlighted(self, value):
+        # Legal-move markers are drawn on the tile too
+        self._highlighted = value
+        self.dirty_tiles.add(self)
 
     def set_piece(self, piece):
-        # Set a piece on the tile and update the piece's tile reference
-        self.piece = piece
-        if piece:
-            piece.tile = self
+        # Moves, captures and promotions all go through here
+        super().set_piece(piece)
+        self.dirty_tiles.add(self)
+
+    def rect(self):
+        # Screen area covered by the tile
+        return pygame.Rect(self.col * self.tile_size, self.row * self.tile_size + 100, self.tile_size, self.tile_size)
 
     def draw(self, screen):
         # Define colors for the tiles
@@ -30,162 +50,85 @@ class Tile:
         if self.selected:
             pygame.draw.rect(screen, outline_color, (self.col * self.tile_size, self.row * self.tile_size + 100, self.tile_size, self.tile_size), 5)
         
+        # Mark the landing square of a legal move of the selected piece
+        if self.highlighted:
+            center = (self.col * self.tile_size + self.tile_size // 2, self.row * self.tile_size + self.tile_size // 2 + 100)
+            pygame.draw.circle(screen, (0, 160, 0), center, self.tile_size // 6)
+
         # Draw the piece if there is one on the tile
         if self.piece:
-            self.piece.draw(screen, self.col * self.tile_size + self.tile_size // 2, self.row * self.tile_size + self.tile_size // 2 + 100)
+            self.piece.draw(screen, self.col * self.tile_size + self.tile_size // 2, self.row * self.tile_size + self.tile_size // 2 + 100, self.tile_size)
 
 
-class Board:
-    def __init__(self, tile_size=100):
+class Board(Rules.Board):
+    def __init__(self, tile_size=100, evaluator=None):
         # Initialize board properties
         self.tile_size = tile_size
-        self.tiles = [[Tile(row, col, tile_size) for col in range(8)] for row in range(8)]
-        self.initialize_pieces()
-        self.current_turn = BLACK  # Starting turn
-        self.previous_turn = None  # Previous move
-        self.selected_piece = None
-        self.player1_points = 0
-        self.player2_points = 0
+        self.dirty_tiles = set()  # Tiles changed since the last draw
+        super().__init__(evaluator)
         self.font = pygame.font.Font(None, 36)
-
-    def initialize_pieces(self):
-        # Place initial pieces on the board
-        for row in range(3):
-            for col in range(8):
-                if (row + col) % 2 == 1:
-                    self.tiles[row][col].set_piece(Pawn(row, col, WHITE))
-        for row in range(5, 8):
-            for col in range(8):
-                if (row + col) % 2 == 1:
-                    self.tiles[row][col].set_piece(Pawn(row, col, BLACK))
-
-    def get_turn_name(self):
-        # Get the name of the current player
-        return "Player 1" if self.current_turn == BLACK else "Player 2"
+        self.text_cache = {}  # Rendered header text surfaces keyed by their text
+        self.status_text = ""  # Extra line in the top bar, e.g. the AI thinking indicator
+        self.overlay_text = ""  # Performance overlay line at the top of the bar (empty when hidden)
+        self.small_font = pygame.font.Font(None, 22)
+        self.header_state = None  # Points and turn shown in the top bar when it was last drawn
+        self.mark_all_dirty()
+
+    def create_tile(self, row, col):
+        # Create tiles that know how to draw themselves
+        return Tile(row, col, self.tile_size, self, self.dirty_tiles)
+
+    def mark_all_dirty(self):
+        # Force a full repaint on the next draw (first frame, window exposed, ...)
+        for row in self.tiles:
+            self.dirty_tiles.update(row)
+        self.header_state = None
 
     def draw(self, screen):
-        # Draw the board
-        for row in range(8):
-            for col in range(8):
-                self.tiles[row][col].draw(screen)
-        
+        # Redraw only what changed and return the screen rects that need updating
+        dirty_rects = []
+        for tile in self.dirty_tiles:
+            tile.draw(screen)
+            dirty_rects.append(tile.rect())
+        self.dirty_tiles.clear()
+
+        header_state = (self.state.player1_points, self.state.player2_points, self.state.get_turn_name(),
+                        self.status_text, self.overlay_text)
+        if header_state != self.header_state:
+            self.header_state = header_state
+            dirty_rects.append(self.draw_header(screen))
+        return dirty_rects
+
+    def draw_header(self, screen):
         # Draw the top bar
-        pygame.draw.rect(screen, (200, 200, 200), (0, 0, 800, 100))  # Light grey bar
+        header_rect = pygame.Rect(0, 0, 800, 100)
+        pygame.draw.rect(screen, (200, 200, 200), header_rect)  # Light grey bar
         
         # Draw player points
-        player1_points_text = self.font.render(f"Player 1: {self.player1_points}", True, (0, 0, 0))
-        player2_points_text = self.font.render(f"Player 2: {self.player2_points}", True, (0, 0, 0))
+        player1_points_text = self.render_text(f"Player 1: {self.state.player1_points}")
+        player2_points_text = self.render_text(f"Player 2: {self.state.player2_points}")
         screen.blit(player1_points_text, (10, 35))
         screen.blit(player2_points_text, (600, 35))
         
         # Draw turn indicator
-        turn_indicator_text = self.font.render(f"Turn: {self.get_turn_name()}", True, (0, 0, 0))
+        turn_indicator_text = self.render_text(f"Turn: {self.state.get_turn_name()}")
         screen.blit(turn_indicator_text, (350, 35))
 
-    def handle_events(self, events):
-        # Handle pygame events
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                clicked_row = (mouse_y - 100) // self.tile_size
-                clicked_col = mouse_x // self.tile_size
-                if 0 <= clicked_row < 8 and 0 <= clicked_col < 8:
-                    self.handle_click(clicked_row, clicked_col)
-
-    def handle_click(self, row, col):
-        # Handle user clicks on the board
-        clicked_tile = self.tiles[row][col]
-        clicked_tile.selected = not clicked_tile.selected
-
-        if clicked_tile.piece and clicked_tile.piece.color == self.current_turn:
-            if self.selected_piece:
-                self.selected_piece.tile.selected = False
-
-            self.selected_piece = clicked_tile.piece
-        elif self.selected_piece:
-            self.try_move(self.selected_piece, row, col)
-
-    def try_move(self, piece, new_row, new_col):
-        # Attempt to move a piece
-        if piece.is_valid_move(new_row, new_col, self.tiles):
-            self.move_piece(piece, new_row, new_col)
-            if abs(new_row - piece.row) == 2 and abs(new_col - piece.col) == 2:
-                self.capture_opponent(piece, new_row, new_col)
-
-            # Check if the piece should be promoted to a king
-            if piece.color == BLACK and new_row == END_ROW_BLACK:
-                piece.make_king()
-            elif piece.color == WHITE and new_row == END_ROW_WHITE:
-                piece.make_king()
-
-            # Switch turns
-            self.current_turn = WHITE if self.current_turn == BLACK else BLACK
-            self.selected_piece = None
-
-    def move_piece(self, piece, new_row, new_col):
-        # Move a piece to a new position
-        self.tiles[piece.row][piece.col].set_piece(None)
-        piece.row = new_row
-        piece.col = new_col
-        self.tiles[new_row][new_col].set_piece(piece)
-
-    def is_piece_attacked(self, piece):
-        # Check if a piece is under attack
-        opponent_color = WHITE if piece.color == BLACK else BLACK
-
-        for row in range(8):
-            for col in range(8):
-                current_tile = self.tiles[row][col]
-                opponent_piece = current_tile.piece
-
-                if opponent_piece and opponent_piece.color == opponent_color:
-                    if opponent_piece.is_valid_move(piece.row + 1, piece.col + 1, self.tiles) or \
-                       opponent_piece.is_valid_move(piece.row + 1, piece.col - 1, self.tiles) or \
-                       (opponent_piece.king and (opponent_piece.is_valid_move(piece.row - 1, piece.col + 1, self.tiles) or
-                                                  opponent_piece.is_valid_move(piece.row - 1, piece.col - 1, self.tiles))):
-                        return True
-
-        return False
-
-    def capture_opponent(self, piece, new_row, new_col):
-        # Capture an opponent's piece
-        opponent_color = WHITE if piece.color == BLACK else BLACK
-        mid_row = (piece.row + new_row) // 2
-        mid_col = (piece.col + new_col) // 2
-
-        if abs(new_row - piece.row) == 2 and abs(new_col - piece.col) == 2:
-            if (
-                0 <= mid_row < 8
-                and 0 <= mid_col < 8
-                and self.tiles[mid_row][mid_col].piece
-                and self.tiles[mid_row][mid_col].piece.color == opponent_color
-            ):
-                self.tiles[mid_row][mid_col].set_piece(None)
-                if opponent_color == WHITE:
-                    self.player1_points += 1
-                else:
-                    self.player2_points += 1
-
-    def check_winner(self):
-        # Check if there's a winner or if the game is a draw
-        player1_pieces = [tile.piece for row in self.tiles for tile in row if tile.piece and tile.piece.color == BLACK]
-        player2_pieces = [tile.piece for row in self.tiles for tile in row if tile.piece and tile.piece.color == WHITE]
-
-        def has_valid_moves(player_pieces):
-            for piece in player_pieces:
-                if piece.get_possible_moves(self.tiles) or piece.get_possible_captures(self.tiles):
-                    return True
-            return False
-
-        if not player1_pieces and not player2_pieces:
-            return 0
-
-        if not player1_pieces or not has_valid_moves(player1_pieces):
-            return WHITE
-        elif not player2_pieces or not has_valid_moves(player2_pieces):
-            return BLACK
-
-        if not has_valid_moves(player1_pieces) and not has_valid_moves(player2_pieces):
-            return "Stalemate"
-
-        return None
+        # Draw the status line (changes every frame while the AI thinks, so it is not cached)
+        if self.status_text:
+            status_text = self.font.render(self.status_text, True, (60, 60, 60))
+            screen.blit(status_text, (350, 68))
+
+        # Draw the performance overlay (also uncached, it changes whenever it is refreshed)
+        if self.overlay_text:
+            overlay_text = self.small_font.render(self.overlay_text, True, (120, 0, 0))
+            screen.blit(overlay_text, (10, 8))
+        return header_rect
+
+    def render_text(self, text):
+        # Render header text once; scores and turn names repeat, so later frames just reuse the surface
+        surface = self.text_cache.get(text)
+        if surface is None:
+            surface = self.font.render(text, True, (0, 0, 0))
+            self.text_cache[text] = surface
+        return surface
@@ -0,0 +1,49 @@
+import random
+from Constants import BLACK, WHITE
+
+# Zobrist keys: one random 64-bit number per (piece kind, square) plus one for
+# WHITE to move. A position's key is the XOR of the keys of everything on it,
+# so a move only has to XOR out what left and XOR in what arrived.
+BLACK_MAN, BLACK_KING, WHITE_MAN, WHITE_KING = 0, 1, 2, 3
+
+_rng = random.Random(0x5EED)  # Fixed seed so keys (and saved hashes) are stable between runs
+PIECE_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(32)) for _ in range(4))
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def piece_kind(color, king):
+    # Index into PIECE_KEYS for a piece
+    return (BLACK_MAN if color == BLACK else WHITE_MAN) + (1 if king else 0)
+
+
+def side_key(color):
+    # Contribution of the side to move
+    return SIDE_KEY if color == WHITE else 0
+
+
+def hash_position(black, white, kings, color=BLACK):
+    # Full (non-incremental) key of a bitboard position, used to seed and verify the incremental keys
+    key = side_key(color)
+    for kind, mask in ((BLACK_MAN, black & ~kings), (BLACK_KING, black & kings),
+                       (WHITE_MAN, white & ~kings), (WHITE_KING, white & kings)):
+        keys = PIECE_KEYS[kind]
+        while mask:
+            low = mask & -mask
+            key ^= keys[low.bit_length() - 1]
+            mask ^= low
+    return key
+
+
+def update_key(key, move, color, kings, new_kings):
+    # Incrementally update a key for a bitboard move: kings/new_kings are the king masks before and after
+    origin, target, captured = move
+    own_base = BLACK_MAN if color == BLACK else WHITE_MAN
+    opp_base = WHITE_MAN if color == BLACK else BLACK_MAN
+    key ^= PIECE_KEYS[own_base + ((kings >> origin) & 1)][origin]
+    key ^= PIECE_KEYS[own_base + ((new_kings >> target) & 1)][target]
+    while captured:
+        low = captured & -captured
+        square = low.bit_length() - 1
+        key ^= PIECE_KEYS[opp_base + ((kings >> square) & 1)][square]
+        captured ^= low
+    return key ^ SIDE_KEY
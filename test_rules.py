@@ -0,0 +1,86 @@
+import io
+import random
+import pytest
+from AI_Player import AIPlayer
+from PDN import PDNRecorder, fen, move_text, parse_move, read_games, replay, result_text
+from Perft import perft, perft_bitboard, position_state
+from Rules import GameState
+from Constants import BLACK, WHITE
+
+# Regression tests for the rules: compulsory captures played as whole jump
+# sequences, kings that slide, and the side to move losing when it is stuck.
+
+# Published English draughts perft counts from the start position
+START_PERFT = [7, 49, 302, 1469, 7361, 36768]
+
+
+def random_games(games, seed=0, max_plies=150):
+    # GameStates along random games, one per position, played with the baseline AIPlayer
+    random.seed(seed)
+    players = {BLACK: AIPlayer(BLACK), WHITE: AIPlayer(WHITE)}
+    for _ in range(games):
+        state = GameState()
+        while state.is_game_over() is None and len(state.undo_stack) < max_plies:
+            yield state
+            players[state.current_turn].make_move(state)
+
+
+@pytest.mark.parametrize("depth", range(1, len(START_PERFT) + 1))
+def test_start_perft(depth):
+    state = GameState()
+    black, white, kings = state.board.bitboard.black, state.board.bitboard.white, state.board.bitboard.kings
+    assert perft_bitboard(black, white, kings, BLACK, depth) == START_PERFT[depth - 1]
+    if depth <= 5:
+        # The Pawn/King generator agrees (deeper is slow through the tiles)
+        assert perft(state, depth) == START_PERFT[depth - 1]
+
+
+def test_make_unmake_round_trip():
+    # Every legal move taken back restores the position, its Zobrist key and the running evaluation
+    captures = 0
+    for state in random_games(20):
+        board = state.board
+        before = (fen(state), board.bitboard.hash, state.zobrist_key, board.score)
+        for move in list(state.legal_moves()):
+            captures += bool(move[2])
+            state.make_move(move)
+            bitboard = board.bitboard
+            assert board.score == board.evaluator.score_position(bitboard.black, bitboard.white, bitboard.kings)
+            state.unmake_move()
+            assert (fen(state), board.bitboard.hash, state.zobrist_key, board.score) == before
+    assert captures > 0
+
+
+def test_batch_engine_matches_rules():
+    BatchEngine = pytest.importorskip("BatchEngine")
+    assert BatchEngine.check_against_rules(positions=300) == 0
+
+
+def test_pdn_round_trip():
+    # Games written as PDN read back to the same positions, and every legal move's text parses back to it
+    multi_captures = 0
+    for index in range(10):
+        random.seed(index)
+        players = {BLACK: AIPlayer(BLACK), WHITE: AIPlayer(WHITE)}
+        state = GameState()
+        state.recorder = PDNRecorder()
+        positions = [fen(state)]
+        while state.is_game_over() is None and len(state.undo_stack) < 150:
+            for move in state.legal_moves():
+                multi_captures += bin(move[2]).count("1") > 1
+                assert parse_move(state, move_text(move)) == move
+            players[state.current_turn].make_move(state)
+            positions.append(fen(state))
+        text = state.recorder.pdn(result_text(state.is_game_over()))
+
+        game, = read_games(io.StringIO(text))
+        assert game["result"] == result_text(state.is_game_over())
+        assert [position for _, position, _ in replay(game)] == positions
+    assert multi_captures > 0
+
+
+def test_stuck_side_loses():
+    # BLACK to move with its only man blocked loses, even with pieces on the board
+    state = position_state("B:W13,14,18:B9")
+    assert not state.legal_moves()
+    assert state.is_game_over() == WHITE
@@ -0,0 +1,26 @@
+import json
+import pytest
+from Server import GameServer, RequestError
+
+# Request checks of the game server that need no running event loop
+
+
+@pytest.fixture
+def server():
+    server = GameServer(workers=1, time_limit=0.2, max_time_limit=5.0)
+    yield server
+    server.pool.shutdown()
+
+
+def test_budget_defaults_and_caps(server):
+    assert server.budget({}, server.time_limit) == 0.2
+    assert server.budget({"time_limit": 1}, server.time_limit) == 1.0
+    assert server.budget({"time_limit": 60}, server.time_limit) == 5.0
+
+
+@pytest.mark.parametrize("text", ["true", "0", "-1", '"1"', "null", "NaN", "Infinity", "-Infinity"])
+def test_budget_rejects_bad_time_limits(server, text):
+    # Request lines are parsed with json.loads, which accepts NaN and Infinity
+    request = json.loads('{"cmd": "new", "time_limit": %s}' % text)
+    with pytest.raises(RequestError):
+        server.budget(request, server.time_limit)